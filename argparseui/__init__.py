@@ -6,7 +6,7 @@
 #      the Free Software Foundation, either version 3 of the License, or     #
 #      (at your option) any later version.                                   #
 #                                                                            #
-#      argparseui is distributed in the hope that it will be useful,         #
+#      argparseui is distributed in the hope that it will be useful,        #
 #      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
 #      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
 #      GNU General Public License for more details.                          #
@@ -15,5 +15,14 @@
 #      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
 ##############################################################################
 
-from .ui import ArgparseUi
-from .ui import __VERSION__ as __version__
+# Qt is only imported when ArgparseUi is first accessed, so tools that
+# merely import argparseui (e.g. to offer an optional gui) stay fast
+from .version import __VERSION__ as __version__
+from .model import OptionsModel
+
+
+def __getattr__(name):
+    if name in ('ArgparseUi', 'DialogCache'):
+        from . import ui
+        return getattr(ui, name)
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
@@ -0,0 +1,104 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+"""
+opt-in timing of the hot paths of the options dialog
+
+ArgparseUi(parser, instrumentation=hook) calls hook(phase, detail, seconds)
+after every instrumented call; phase names the method (e.g. 'create_ui',
+'makeStoreActionEntry', 'makeCommandLine'), detail is the argparse action
+type for per-action methods and None otherwise. Timings is a ready-made
+hook that aggregates counts and durations and prints a summary:
+
+    timings = argparseui.instrumentation.Timings()
+    a = argparseui.ArgparseUi(parser, instrumentation=timings)
+    ...
+    print(timings.summary())
+
+without a hook nothing is wrapped, so instrumentation costs nothing
+"""
+
+import time
+
+
+class Timings(object):
+    """
+    hook that keeps count, total and maximum duration per (phase, detail)
+    """
+    def __init__(self):
+        self.stats = {}
+
+    def __call__(self, phase, detail, seconds):
+        key = (phase, detail)
+        stat = self.stats.get(key)
+        if stat is None:
+            self.stats[key] = [1, seconds, seconds]
+        else:
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = max(stat[2], seconds)
+
+    def clear(self):
+        self.stats.clear()
+
+    def asDict(self):
+        """
+        {phase: {detail: {'count': n, 'total': s, 'max': s}}}
+        """
+        result = {}
+        for (phase, detail), (count, total, maximum) in self.stats.items():
+            result.setdefault(phase, {})[detail] = {'count': count, 'total': total, 'max': maximum}
+        return result
+
+    def summary(self):
+        """
+        table of all phases, slowest (in total) first
+        """
+        lines = ["{0:<32} {1:<24} {2:>8} {3:>12} {4:>10} {5:>10}".format(
+            "phase", "detail", "count", "total [ms]", "mean [ms]", "max [ms]")]
+        for (phase, detail), (count, total, maximum) in sorted(self.stats.items(), key=lambda i: -i[1][1]):
+            lines.append("{0:<32} {1:<24} {2:>8} {3:>12.3f} {4:>10.3f} {5:>10.3f}".format(
+                phase, detail or "", count, total * 1000, total * 1000 / count, maximum * 1000))
+        return "\n".join(lines)
+
+
+def timed(hook, phase, function, detail=None, slot=False):
+    """
+    wrap function so that every call is reported to hook;
+    detail, if given, computes the detail from the call's arguments;
+    slot=True drops all arguments (e.g. the checked flag of clicked signals)
+    """
+    def call(*args, **kwargs):
+        if slot:
+            args, kwargs = (), {}
+        t0 = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            hook(phase, detail(*args, **kwargs) if detail is not None else None, time.perf_counter() - t0)
+    return call
+
+
+def actionTypeName(a, *args, **kwargs):
+    return type(a).__name__
+
+
+def elapsed(hook, phase, t0, detail=None):
+    """
+    report the time since t0 (a time.perf_counter() value) to hook
+    """
+    hook(phase, detail, time.perf_counter() - t0)
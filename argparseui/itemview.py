@@ -0,0 +1,265 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+"""
+model/view based rendering of the parser options
+
+instead of creating a checkbox and an editor widget per argparse action,
+all actions are exposed through one table model; a delegate creates an
+editor only for the cell that is being edited, and labels are computed
+only for rows that are actually painted
+"""
+
+import shlex
+
+from .qt import QtCore, QtGui, QtGuiBase
+from .ui import quote
+from .widgets import ChoicesEditor
+
+OPTION_COLUMN = 0
+VALUE_COLUMN = 1
+
+
+def quoteList(values):
+    """
+    represent a list of strings as one editable, shell-like string
+    """
+    return " ".join(quote(v) for v in values)
+
+
+def unquoteList(text):
+    """
+    inverse of quoteList
+    """
+    try:
+        return shlex.split(text)
+    except ValueError:
+        return text.split()
+
+
+def displayValue(state):
+    if state.kind == 'const':
+        return ""
+    if state.kind == 'append':
+        return quoteList(state.value)
+    return "{0}".format(state.value)
+
+
+class ActionsTableModel(QtCore.QAbstractTableModel):
+    """
+    table model on top of an OptionsModel, with one row per option state:
+    column 0 holds the (checkable) option label, column 1 its value;
+    setFilter limits the rows to a subset of the states
+    """
+    def __init__(self, model, labeller, parent=None):
+        super(ActionsTableModel, self).__init__(parent)
+        self.model = model
+        self.labeller = labeller
+        self.rows = model.states
+        self.stateToRow = dict((state, i) for i, state in enumerate(self.rows))
+        self.labels = {}
+        self.errors = {}
+        model.addListener(self.onStateChanged)
+
+    def row(self, index):
+        return self.rows[index.row()]
+
+    def setFilter(self, visible):
+        """
+        show only the states in the set visible (in their original order),
+        or all states if visible is None
+        """
+        self.beginResetModel()
+        self.rows = self.model.states if visible is None else [s for s in self.model.states if s in visible]
+        self.stateToRow = dict((state, i) for i, state in enumerate(self.rows))
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return 2
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return ["Option", "Value"][section]
+        return None
+
+    def label(self, row):
+        """
+        labels are only computed (and then cached) for rows that get painted
+        """
+        state = self.rows[row]
+        if state not in self.labels:
+            self.labels[state] = self.labeller(state)
+        return self.labels[state]
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        r = self.rows[index.row()]
+        if index.column() == OPTION_COLUMN:
+            if role == QtCore.Qt.DisplayRole:
+                return self.label(index.row()).replace("\n", " ")
+            elif role == QtCore.Qt.ToolTipRole:
+                return self.label(index.row())
+            elif role == QtCore.Qt.CheckStateRole:
+                return QtCore.Qt.Checked if r.enabled else QtCore.Qt.Unchecked
+            elif role == QtCore.Qt.ForegroundRole and self.model.isMutexViolation(r):
+                return QtGuiBase.QBrush(QtCore.Qt.red)
+        else:
+            if role == QtCore.Qt.DisplayRole:
+                return displayValue(r)
+            elif role == QtCore.Qt.EditRole:
+                return r.value
+            elif role in [QtCore.Qt.ForegroundRole, QtCore.Qt.ToolTipRole] and r.enabled:
+                # values are checked in the background by the dialog, see setError
+                error = self.errors.get(r)
+                if error is not None:
+                    return QtGuiBase.QBrush(QtCore.Qt.red) if role == QtCore.Qt.ForegroundRole else error
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        r = self.rows[index.row()]
+        if index.column() == OPTION_COLUMN:
+            return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsUserCheckable
+        if r.kind == 'const':
+            return QtCore.Qt.NoItemFlags
+        if r.enabled:
+            return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEditable
+        return QtCore.Qt.ItemIsSelectable
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid():
+            return False
+        r = self.rows[index.row()]
+        if index.column() == OPTION_COLUMN and role == QtCore.Qt.CheckStateRole:
+            self.model.setEnabled(r, value == QtCore.Qt.Checked, self)
+        elif index.column() == VALUE_COLUMN and role == QtCore.Qt.EditRole:
+            self.model.setValue(r, value, self)
+        else:
+            return False
+        self.rowChanged(index.row())
+        return True
+
+    def setError(self, state, error):
+        """
+        show the outcome of checking the value of state (None if the value is fine)
+        """
+        if self.errors.get(state) == error:
+            return
+        if error is None:
+            del self.errors[state]
+        else:
+            self.errors[state] = error
+        if state in self.stateToRow:
+            self.rowChanged(self.stateToRow[state])
+
+    def rowChanged(self, row):
+        self.dataChanged.emit(self.index(row, OPTION_COLUMN), self.index(row, VALUE_COLUMN))
+
+    def onStateChanged(self, state, origin):
+        """
+        model listener: repaint rows changed by someone else (e.g. loading a file),
+        and the rows whose mutex conflicts may have changed along with them
+        """
+        if origin is not self and state in self.stateToRow:
+            self.rowChanged(self.stateToRow[state])
+        for g in self.model.stateToMutexGroups.get(state, []):
+            for member in self.model.mutexMembers[g]:
+                if member is not state and member in self.stateToRow:
+                    self.rowChanged(self.stateToRow[member])
+
+
+class ActionEditorDelegate(QtGui.QStyledItemDelegate):
+    """
+    creates the editor widget for a value cell on demand;
+    only the cell currently being edited owns a widget
+    """
+    def __init__(self, validatorFactory, parent=None):
+        super(ActionEditorDelegate, self).__init__(parent)
+        self.validatorFactory = validatorFactory
+
+    def createEditor(self, parent, option, index):
+        r = index.model().row(index)
+        if r.kind in ['choice', 'subparsers']:
+            editor = ChoicesEditor(r.action.choices, parent)
+        elif r.kind == 'count':
+            editor = QtGui.QSpinBox(parent)
+            editor.setRange(0, 100)
+        else:
+            editor = QtGui.QLineEdit(parent)
+            if r.kind == 'store':
+                validator = self.validatorFactory(r)
+                if validator is not None:
+                    editor.setValidator(validator(editor))
+        return editor
+
+    def setEditorData(self, editor, index):
+        r = index.model().row(index)
+        if r.kind in ['choice', 'subparsers']:
+            editor.selectText(r.value, r.action.default)
+        elif r.kind == 'count':
+            editor.setValue(r.value)
+        elif r.kind == 'append':
+            editor.setText(quoteList(r.value))
+        else:
+            editor.setText(r.value)
+
+    def setModelData(self, editor, model, index):
+        r = model.row(index)
+        if r.kind in ['choice', 'subparsers']:
+            value = editor.currentChoice()
+        elif r.kind == 'count':
+            value = editor.value()
+        elif r.kind == 'append':
+            value = unquoteList("{0}".format(editor.text()))
+        else:
+            value = "{0}".format(editor.text())
+        model.setData(index, value, QtCore.Qt.EditRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect)
+
+
+def makeActionsView(model, validatorFactory, parent=None):
+    """
+    create a table view on an ActionsTableModel; rows have a fixed height
+    so the view never needs to measure rows that are not visible
+    """
+    view = QtGui.QTableView(parent)
+    view.setModel(model)
+    view.setItemDelegateForColumn(VALUE_COLUMN, ActionEditorDelegate(validatorFactory, view))
+    view.setEditTriggers(QtGui.QAbstractItemView.AllEditTriggers)
+    view.setSelectionMode(QtGui.QAbstractItemView.SingleSelection)
+    view.setWordWrap(False)
+    rows = view.verticalHeader()
+    if hasattr(rows, "setSectionResizeMode"):
+        rows.setSectionResizeMode(QtGui.QHeaderView.Fixed)
+    else:
+        rows.setResizeMode(QtGui.QHeaderView.Fixed)  # Qt4
+    rows.setDefaultSectionSize(view.fontMetrics().height() + 8)
+    rows.hide()
+    view.horizontalHeader().setStretchLastSection(True)
+    view.horizontalHeader().resizeSection(OPTION_COLUMN, 400)
+    return view
@@ -0,0 +1,276 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+"""
+autosaving the options of a model to a journal, for crash recovery
+
+Autosave listens to an options model and records every changed option; a
+background thread appends the changes (one JSON line per option) to a journal
+file once the edits pause for a moment. Every few hundred records the journal
+is compacted into a snapshot of all options that were changed in the session.
+Both files are named after a key derived from the parser, so the next
+Autosave for the same parser can recover the options of a session that did
+not end normally. Dialogs for the same parser that are open at the same time
+each lock a journal slot of their own (key, key-1, key-2, ...); the lock ends
+with the process, so the slot of a crashed session can be taken over and
+recovered. The work done per edit is proportional to the edit, not to the
+number of options.
+"""
+
+import os
+import json
+import time
+import hashlib
+import itertools
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# seconds without edits before the changes are written, and the longest a change waits
+DELAY = 1.0
+MAX_DELAY = 5.0
+
+# number of journal records after which the journal is compacted into the snapshot
+COMPACT_EVERY = 500
+
+
+def defaultDirectory():
+    return os.path.join(os.path.expanduser("~"), ".argparseui", "autosave")
+
+
+def parserKey(model):
+    """
+    key identifying a parser across runs (unlike the schema fingerprint, which holds
+    the converter functions themselves, it only depends on names)
+    """
+    parts = [model.parser.prog]
+    parts.extend("{0}|{1}|{2}".format(o.option_string, o.dest, o.kind) for o in model.schema.options)
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def lockSlot(filename):
+    """
+    open and lock filename without waiting; returns the open file, or None if
+    another Autosave holds the lock
+    """
+    f = open(filename, "a")
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except (IOError, OSError):
+        f.close()
+        return None
+    return f
+
+
+def unlockSlot(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    f.close()
+
+
+def readRecords(filename):
+    """
+    the records of a journal; a torn last line (from a crash while writing) is ignored
+    """
+    records = []
+    try:
+        with open(filename) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+    except IOError:
+        pass
+    return records
+
+
+class Autosave(object):
+    """
+    journal of the changes to the options of a model, written by a background thread;
+    call recover() before start() to get the options of an earlier, interrupted session
+    """
+    def __init__(self, model, directory=None, delay=DELAY, max_delay=MAX_DELAY, compact_every=COMPACT_EVERY):
+        self.model = model
+        self.directory = directory if directory is not None else defaultDirectory()
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        key = parserKey(model)
+        for i in itertools.count():
+            slot = key if i == 0 else "{0}-{1}".format(key, i)
+            self.lock = lockSlot(os.path.join(self.directory, slot + ".lock"))
+            if self.lock is not None:
+                break
+        self.journalFile = os.path.join(self.directory, slot + ".journal")
+        self.snapshotFile = os.path.join(self.directory, slot + ".snapshot")
+        self.delay = delay
+        self.max_delay = max_delay
+        self.compact_every = compact_every
+        self.stateToIndex = dict((s, i) for i, s in enumerate(model.states))
+        self.condition = threading.Condition()
+        self.pending = {}
+        self.firstChange = self.lastChange = None
+        self.stopping = False
+        self.thread = None
+        # only touched by the writer thread (and by close, after the thread ended)
+        self.written = {}
+        self.records = 0
+        self.journal = None
+
+    def saved(self):
+        """
+        the last saved record of every option in snapshot and journal, by index
+        """
+        saved = {}
+        try:
+            with open(self.snapshotFile) as f:
+                for record in json.load(f):
+                    saved[record["index"]] = record
+        except (IOError, ValueError):
+            pass
+        for record in readRecords(self.journalFile):
+            saved[record["index"]] = record
+        return saved
+
+    def recover(self):
+        """
+        (state, enabled, value) for the options saved by an earlier session that differ from
+        the current ones; records that do not fit the model anymore are skipped
+        """
+        changes = []
+        for index, record in sorted(self.saved().items()):
+            if not 0 <= index < len(self.model.states):
+                continue
+            state = self.model.states[index]
+            if state.action.dest != record["dest"]:
+                continue
+            if (state.enabled, state.value) != (record["enabled"], record["value"]):
+                changes.append((state, record["enabled"], record["value"]))
+        return changes
+
+    def start(self):
+        """
+        start journaling the changes of the model (the files of an earlier session are reused,
+        so what recover() found stays recoverable until it is overwritten or discarded)
+        """
+        self.written = self.saved()
+        self.records = len(readRecords(self.journalFile))
+        self.journal = open(self.journalFile, "a")
+        self.model.addListener(self.onStateChanged)
+        self.thread = threading.Thread(target=self.run, name="argparseui autosave")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def onStateChanged(self, state, origin):
+        index = self.stateToIndex.get(state)
+        if index is None:
+            return
+        value = list(state.value) if isinstance(state.value, list) else state.value
+        with self.condition:
+            self.pending[index] = {"index": index, "dest": state.action.dest, "enabled": state.enabled, "value": value}
+            self.lastChange = time.time()
+            if self.firstChange is None:
+                self.firstChange = self.lastChange
+            self.condition.notify()
+
+    def takePending(self):
+        """
+        wait until the edits pause (or the oldest one waited max_delay), then take them;
+        returns None when stopping with nothing left to write
+        """
+        with self.condition:
+            while not self.pending and not self.stopping:
+                self.condition.wait()
+            while self.pending and not self.stopping:
+                now = time.time()
+                wait = min(self.lastChange + self.delay, self.firstChange + self.max_delay) - now
+                if wait <= 0:
+                    break
+                self.condition.wait(wait)
+            if not self.pending:
+                return None
+            pending, self.pending = self.pending, {}
+            self.firstChange = self.lastChange = None
+            return pending
+
+    def run(self):
+        while True:
+            pending = self.takePending()
+            if pending is None:
+                return
+            self.write(pending)
+
+    def write(self, pending):
+        for index, record in sorted(pending.items()):
+            self.journal.write(json.dumps(record, default=str) + "\n")
+            self.written[index] = record
+        self.journal.flush()
+        self.records += len(pending)
+        if self.records >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """
+        replace snapshot and journal by a new snapshot of everything written so far
+        """
+        temporary = self.snapshotFile + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump([self.written[i] for i in sorted(self.written)], f, default=str)
+        os.replace(temporary, self.snapshotFile)
+        self.journal.close()
+        self.journal = open(self.journalFile, "w")
+        self.records = 0
+
+    def close(self, discard=False):
+        """
+        stop journaling; pending changes are written first. discard=True removes the
+        journal and snapshot (e.g. when the session ended normally)
+        """
+        if self.onStateChanged in self.model.listeners:
+            self.model.removeListener(self.onStateChanged)
+        if self.thread is not None:
+            with self.condition:
+                self.stopping = True
+                self.condition.notify()
+            self.thread.join()
+            self.thread = None
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        if discard:
+            self.discard()
+        if self.lock is not None:
+            unlockSlot(self.lock)
+            self.lock = None
+
+    def discard(self):
+        for filename in [self.journalFile, self.snapshotFile]:
+            if os.path.exists(filename):
+                os.remove(filename)
+        self.written = {}
+        self.records = 0
@@ -0,0 +1,385 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+"""
+running the configured program without blocking the dialog
+
+Launcher keeps a bounded pool of runs: at most max_parallel run at the same
+time, the others wait in a queue. A run is either a command (started with
+QProcess, so its output arrives through the event loop) or a picklable
+callable that is called with the parsed namespace in a worker process (its
+stdout and stderr are sent back through a pipe that is polled by a timer).
+Worker processes are spawned, not forked: forking a process that runs Qt and
+several threads can deadlock the child, so the callable and the namespace are
+pickled and must be picklable (e.g. a module level function, and no FileType
+options, whose values are open files).
+LaunchPanel shows the runs and the output of the selected one.
+"""
+
+import sys
+import collections
+import multiprocessing
+import concurrent.futures
+
+from .qt import QtCore, QtGui, QtGuiBase
+
+QUEUED, RUNNING, FINISHED, FAILED, CANCELLED = "queued", "running", "finished", "failed", "cancelled"
+
+# how often the pipes of callable runs are polled, and the output panel is refreshed [ms]
+POLL_INTERVAL = 50
+
+# output chunks kept per run, and lines kept by the log panel (older ones are dropped)
+MAX_OUTPUT_LINES = 10000
+
+# output chunks read per run and poll, so a chatty run cannot keep the event loop busy
+MAX_CHUNKS_PER_POLL = 100
+
+
+class _PipeWriter(object):
+    """
+    file-like object that sends everything written to it through a multiprocessing connection
+    """
+    def __init__(self, connection, stream):
+        self.connection = connection
+        self.stream = stream
+
+    def write(self, text):
+        if text:
+            self.connection.send((self.stream, text))
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def _runCallable(function, namespace, connection):
+    """
+    entry point of the worker process of a callable run
+    """
+    sys.stdout = _PipeWriter(connection, "stdout")
+    sys.stderr = _PipeWriter(connection, "stderr")
+    try:
+        function(namespace)
+    except SystemExit as e:
+        sys.exit(e.code)
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        connection.close()
+
+
+class Run(object):
+    """
+    one run of the program: arguments is the command line it was started with;
+    output holds (stream, text) chunks, most recent last
+    """
+    def __init__(self, number, arguments, namespace=None):
+        self.number = number
+        self.arguments = arguments
+        self.namespace = namespace
+        self.status = QUEUED
+        self.exitCode = None
+        self.output = collections.deque(maxlen=MAX_OUTPUT_LINES)
+        self.process = None
+        self.connection = None
+
+    def description(self):
+        code = "" if self.exitCode is None else " ({0})".format(self.exitCode)
+        return "#{0} {1}{2}: {3}".format(self.number, self.status, code, " ".join(self.arguments))
+
+
+class Launcher(QtCore.QObject):
+    """
+    runs command lines in a bounded pool; with a command (list of strings), the command
+    line is appended to it and run as a subprocess; with a callable, it is called with the
+    parsed namespace in a worker process (so it must be picklable, e.g. a module level function).
+    parse turns a command line into a namespace; it is called in a worker thread of executor
+    (a concurrent.futures executor, by default one of its own) when a callable run starts
+    """
+    changed = QtCore.pyqtSignal(object)  # a run changed status
+    output = QtCore.pyqtSignal(object, str, str)  # run, stream ('stdout' or 'stderr'), text
+    parsed = QtCore.pyqtSignal(object)  # internal: carries a finished parse future to the GUI thread
+
+    def __init__(self, command=None, function=None, max_parallel=2, parse=None, executor=None, parent=None):
+        super(Launcher, self).__init__(parent)
+        self.command = command
+        self.function = function
+        self.max_parallel = max_parallel
+        self.parse = parse
+        self.executor = executor
+        self.parsed.connect(self.onParsed, QtCore.Qt.QueuedConnection)
+        self.runs = []
+        self.queue = collections.deque()
+        self.sources = collections.deque()
+        self.running = set()
+        self.pollTimer = QtCore.QTimer(self)
+        self.pollTimer.setInterval(POLL_INTERVAL)
+        self.pollTimer.timeout.connect(self.poll)
+
+    def submit(self, arguments, namespace=None):
+        """
+        queue a run of the command line arguments (namespace is what callables are called with)
+        """
+        run = self.makeRun(arguments, namespace)
+        self.queue.append(run)
+        self.startQueued()
+        return run
+
+    def submitMany(self, commandLines):
+        """
+        queue a run for every command line of an iterable; the iterable is consumed
+        lazily, one command line whenever a slot in the pool frees up
+        """
+        self.sources.append(iter(commandLines))
+        self.startQueued()
+
+    def makeRun(self, arguments, namespace=None):
+        run = Run(len(self.runs) + 1, list(arguments), namespace)
+        self.runs.append(run)
+        self.changed.emit(run)
+        return run
+
+    def rerun(self, run):
+        return self.submit(run.arguments, run.namespace)
+
+    def cancel(self, run):
+        if run.status == QUEUED:
+            self.queue.remove(run)
+            self.setStatus(run, CANCELLED)
+        elif run.status == RUNNING and run.process is None:
+            # still being parsed: onParsed will not start it
+            self.running.discard(run)
+            self.setStatus(run, CANCELLED)
+            self.startQueued()
+        elif run.status == RUNNING:
+            run.status = CANCELLED
+            if isinstance(run.process, QtCore.QProcess):
+                run.process.kill()
+            else:
+                run.process.terminate()
+
+    def cancelAll(self):
+        self.sources.clear()
+        for run in list(self.queue) + list(self.running):
+            self.cancel(run)
+
+    def setStatus(self, run, status):
+        run.status = status
+        self.changed.emit(run)
+
+    def startQueued(self):
+        while len(self.running) < self.max_parallel:
+            if self.queue:
+                run = self.queue.popleft()
+            elif self.sources:
+                try:
+                    run = self.makeRun(next(self.sources[0]))
+                except StopIteration:
+                    self.sources.popleft()
+                    continue
+            else:
+                break
+            self.running.add(run)
+            self.setStatus(run, RUNNING)
+            if self.function is not None:
+                self.startCallable(run)
+            else:
+                self.startProcess(run)
+
+    def startProcess(self, run):
+        process = run.process = QtCore.QProcess(self)
+        process.readyReadStandardOutput.connect(
+            lambda: self.received(run, "stdout", process.readAllStandardOutput()))
+        process.readyReadStandardError.connect(
+            lambda: self.received(run, "stderr", process.readAllStandardError()))
+        process.finished.connect(lambda code, status=None: self.finished(run, code))
+        if hasattr(process, "errorOccurred"):
+            process.errorOccurred.connect(lambda error: self.failedToStart(run, process))
+        else:
+            process.error.connect(lambda error: self.failedToStart(run, process))
+        process.start(self.command[0], self.command[1:] + run.arguments)
+
+    def getExecutor(self):
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        return self.executor
+
+    def startCallable(self, run):
+        if run.namespace is None and self.parse is not None:
+            # parsing runs the type= converters, which can be slow: not on the GUI thread
+            future = self.getExecutor().submit(self.parse, run.arguments)
+            future.run = run
+            future.add_done_callback(self.parsed.emit)
+            return
+        self.spawn(run)
+
+    def onParsed(self, future):
+        run = future.run
+        if run.status != RUNNING:
+            return
+        if future.exception() is not None:
+            self.fail(run, future.exception())
+            return
+        run.namespace = future.result()
+        self.spawn(run)
+
+    def fail(self, run, error):
+        self.received(run, "stderr", "{0}\n".format(error))
+        self.running.discard(run)
+        self.setStatus(run, FAILED)
+        self.startQueued()
+
+    def spawn(self, run):
+        context = multiprocessing.get_context("spawn")
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_runCallable, args=(self.function, run.namespace, sender))
+        process.daemon = True
+        try:
+            process.start()
+        except Exception as e:
+            # e.g. the function or the namespace cannot be pickled
+            receiver.close()
+            sender.close()
+            self.fail(run, e)
+            return
+        sender.close()
+        run.connection = receiver
+        run.process = process
+        self.pollTimer.start()
+
+    def received(self, run, stream, data):
+        text = data if isinstance(data, str) else bytes(data).decode("utf-8", "replace")
+        run.output.append((stream, text))
+        self.output.emit(run, stream, text)
+
+    def failedToStart(self, run, process):
+        if process.state() == QtCore.QProcess.NotRunning and run in self.running:
+            self.received(run, "stderr", "{0}\n".format(process.errorString()))
+            self.finished(run, None)
+
+    def finished(self, run, code):
+        if run not in self.running:
+            return
+        self.running.discard(run)
+        run.exitCode = code
+        if run.status != CANCELLED:
+            run.status = FINISHED if code == 0 else FAILED
+        self.changed.emit(run)
+        self.startQueued()
+
+    def poll(self):
+        """
+        forward the output of callable runs, and notice when their processes ended
+        """
+        callables = [r for r in self.running if r.connection is not None]
+        for run in callables:
+            alive = run.process.is_alive()
+            drained = True
+            try:
+                for i in range(MAX_CHUNKS_PER_POLL):
+                    if not run.connection.poll():
+                        break
+                    stream, text = run.connection.recv()
+                    self.received(run, stream, text)
+                else:
+                    drained = False
+            except (EOFError, OSError):
+                pass
+            if not alive and drained:
+                run.process.join()
+                run.connection.close()
+                self.finished(run, run.process.exitcode)
+        if not any(r.connection is not None for r in self.running):
+            self.pollTimer.stop()
+
+
+class LaunchPanel(QtGui.QWidget):
+    """
+    list of the runs of a launcher with the output of the selected run (new output
+    is appended at most every POLL_INTERVAL ms), and buttons to cancel or rerun
+    """
+    def __init__(self, launcher, parent=None):
+        super(LaunchPanel, self).__init__(parent)
+        self.launcher = launcher
+        self.pending = []
+        layout = QtGui.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        splitter = QtGui.QSplitter(QtCore.Qt.Vertical, self)
+        self.runsView = QtGui.QListWidget(splitter)
+        self.runsView.currentRowChanged.connect(self.showRun)
+        self.log = QtGui.QPlainTextEdit(splitter)
+        self.log.setReadOnly(True)
+        self.log.setMaximumBlockCount(MAX_OUTPUT_LINES)
+        layout.addWidget(splitter)
+        row = QtGui.QHBoxLayout()
+        for label, handler in [("Cancel", self.onCancel), ("Rerun", self.onRerun), ("Cancel all", launcher.cancelAll)]:
+            b = QtGui.QPushButton(label, self)
+            b.clicked.connect(lambda checked=False, handler=handler: handler())
+            row.addWidget(b)
+        layout.addLayout(row)
+        self.flushTimer = QtCore.QTimer(self)
+        self.flushTimer.setInterval(POLL_INTERVAL)
+        self.flushTimer.timeout.connect(self.flush)
+        launcher.changed.connect(self.onChanged)
+        launcher.output.connect(self.onOutput)
+        for run in launcher.runs:
+            self.onChanged(run)
+
+    def currentRun(self):
+        row = self.runsView.currentRow()
+        return self.launcher.runs[row] if 0 <= row < len(self.launcher.runs) else None
+
+    def onChanged(self, run):
+        row = run.number - 1
+        if row < self.runsView.count():
+            self.runsView.item(row).setText(run.description())
+        else:
+            self.runsView.addItem(run.description())
+            self.runsView.setCurrentRow(row)
+
+    def onOutput(self, run, stream, text):
+        if run is self.currentRun():
+            self.pending.append(text)
+            if not self.flushTimer.isActive():
+                self.flushTimer.start()
+
+    def flush(self):
+        self.flushTimer.stop()
+        if self.pending:
+            cursor = self.log.textCursor()
+            cursor.movePosition(QtGuiBase.QTextCursor.End)
+            cursor.insertText("".join(self.pending))
+            self.pending = []
+            self.log.ensureCursorVisible()
+
+    def showRun(self, row):
+        self.pending = []
+        run = self.currentRun()
+        self.log.setPlainText("".join(text for stream, text in run.output) if run is not None else "")
+        self.log.moveCursor(QtGuiBase.QTextCursor.End)
+
+    def onCancel(self):
+        run = self.currentRun()
+        if run is not None:
+            self.launcher.cancel(run)
+
+    def onRerun(self):
+        run = self.currentRun()
+        if run is not None:
+            self.launcher.rerun(run)
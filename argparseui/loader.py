@@ -0,0 +1,120 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+"""
+loading argument files without freezing the dialog
+
+ArgumentFileLoader reads, tokenizes and parses the file in a worker thread;
+BatchApplier then works out which options the parsed values change and
+copies only those into the options model, a few hundred per event loop
+iteration
+"""
+
+from .qt import QtCore
+from .model import LoadCancelled, LoadError
+
+
+class ArgumentFileLoader(QtCore.QThread):
+    """
+    parses an argument file in a worker thread; emits progress(fraction)
+    while reading, then exactly one of loaded(namespace), failed(message)
+    or cancelled()
+    """
+    progress = QtCore.pyqtSignal(float)
+    loaded = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+
+    def __init__(self, model, filename, parent=None):
+        super(ArgumentFileLoader, self).__init__(parent)
+        self.model = model
+        self.filename = filename
+        self.cancelRequested = False
+
+    def cancel(self):
+        self.cancelRequested = True
+
+    def isCancelRequested(self):
+        return self.cancelRequested
+
+    def run(self):
+        try:
+            namespace = self.model.parseArgumentFile(self.filename, self.progress.emit, self.isCancelRequested)
+        except LoadCancelled:
+            self.cancelled.emit()
+        except LoadError as e:
+            self.failed.emit("{0}".format(e))
+        except (IOError, UnicodeDecodeError) as e:
+            self.failed.emit("Couldn't read file {0}: {1}".format(self.filename, e))
+        except Exception as e:
+            # e.g. raised by a converter of an option with choices; an exception
+            # leaving run() would abort the whole program
+            self.failed.emit("{0}".format(e))
+        else:
+            self.loaded.emit(namespace)
+
+
+class BatchApplier(QtCore.QObject):
+    """
+    applies a parsed namespace to an options model: only the options that change
+    are updated, batch_size of them per event loop iteration; subcommands follow
+    in the last batch. Updates of the suspended widget (if any) are disabled while
+    a batch runs, so it is repainted once per batch. Emits finished()
+    """
+    finished = QtCore.pyqtSignal()
+
+    def __init__(self, model, namespace, origin=None, batch_size=250, suspended=None, parent=None):
+        super(BatchApplier, self).__init__(parent)
+        self.model = model
+        self.namespace = namespace
+        self.origin = origin
+        self.batch_size = batch_size
+        self.suspended = suspended
+        self.changes = model.namespaceChanges(namespace)
+        self.subcommands = [dest for dest, states in model.destToStates.items()
+                            if any(s.kind == 'subparsers' for s in states)]
+        self.position = 0
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.step)
+
+    def start(self):
+        self.timer.start(0)
+
+    def cancel(self):
+        """
+        stop applying; the batches applied so far stay applied, finished() is not emitted
+        """
+        self.timer.stop()
+        self.changes = []
+        self.deleteLater()
+
+    def step(self):
+        batch = self.changes[self.position:self.position + self.batch_size]
+        self.position += self.batch_size
+        last = self.position >= len(self.changes)
+        if self.suspended is not None:
+            self.suspended.setUpdatesEnabled(False)
+        try:
+            self.model.applyChanges(batch, self.origin)
+            if last and self.subcommands:
+                self.model.applyNamespace(self.namespace, self.origin, self.subcommands)
+        finally:
+            if self.suspended is not None:
+                self.suspended.setUpdatesEnabled(True)
+        if last:
+            self.timer.stop()
+            self.finished.emit()
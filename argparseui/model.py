@@ -0,0 +1,807 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+"""
+Qt-free model of the state of the options dialog
+
+every argparse action is represented by one OptionState record that holds
+whether the option is included on the command line and with which value;
+the dialog widgets only display and edit these records, so command lines can
+be built, saved, loaded and validated without creating a QApplication
+"""
+
+import argparse
+import collections
+import copy
+import io
+import os
+
+from .schema import IGNORED_ACTION_TYPES, compileParser, parserActions
+
+
+# number of converted values remembered per model
+CONVERTER_CACHE_SIZE = 1024
+
+
+class ParseError(Exception):
+    """
+    raised instead of exiting when arguments are invalid; the message is argparse's
+    """
+    pass
+
+
+class LoadError(ParseError):
+    """
+    raised when an argument file cannot be parsed
+    """
+    pass
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+def _raiseParseError(message):
+    raise ParseError(message)
+
+
+def _raiseLoadError(message):
+    raise LoadError(message)
+
+
+class ConverterCache(object):
+    """
+    memoizes type= converters: the result (or the exception) of converting a text
+    is remembered per (converter, text), so checking a value that was checked
+    before costs a dictionary lookup; only the size most recently used results are kept
+    """
+    def __init__(self, size=CONVERTER_CACHE_SIZE):
+        self.size = size
+        self.results = collections.OrderedDict()
+
+    def convert(self, converter, text):
+        key = (converter, text)
+        try:
+            ok, result = self.results.pop(key)
+        except KeyError:
+            try:
+                ok, result = True, converter(text)
+            except Exception as e:
+                ok, result = False, e
+            while len(self.results) >= self.size:
+                self.results.popitem(last=False)
+        self.results[key] = ok, result
+        if not ok:
+            raise result
+        return result
+
+    def wrap(self, converter):
+        """
+        memoizing version of converter
+        """
+        def convert(text):
+            return self.convert(converter, text)
+        return convert
+
+    def clear(self):
+        self.results.clear()
+
+
+class OptionState(object):
+    """
+    state of one argparse action: enabled tells if it is included on the
+    command line, value holds its value in the representation used by the ui:
+      const  -> None
+      store  -> text (multiple values separated by spaces)
+      choice -> text of the selected choice
+      count  -> int
+      append -> list of strings
+      subparsers -> name of the selected subcommand
+    schema holds the compiled schema.OptionSchema of the action
+    segment caches commandLine() and is reset to None whenever the state changes
+    """
+    __slots__ = ('action', 'schema', 'kind', 'enabled', 'value', 'segment')
+
+    def __init__(self, action, schema):
+        self.action = action
+        self.schema = schema
+        self.kind = schema.kind
+        self.enabled, self.value = self.defaultState()
+        self.segment = None
+
+    def defaultState(self):
+        """
+        (enabled, value) of this option as derived from the parser defaults
+        """
+        a = self.action
+        enabled = a.default is not None
+        if self.kind == 'const':
+            return bool(a.default), None
+        elif self.kind == 'count':
+            return enabled, a.nargs
+        elif self.kind == 'append':
+            return enabled, ["{0}".format(d) for d in a.default] if a.default else []
+        elif a.default is not None:
+            return enabled, "{0}".format(a.default)
+        elif self.kind == 'choice':
+            return enabled, "{0}".format(next(iter(a.choices)))
+        elif self.kind == 'subparsers':
+            return bool(getattr(a, 'required', False)), next(iter(a.choices), "")
+        return enabled, ""
+
+    def commandLine(self):
+        """
+        command line fragment for this option
+        """
+        if not self.enabled:
+            return []
+        a = self.action
+        if self.kind == 'const':
+            return ["{0}".format(a.option_strings[0])]
+        elif self.kind == 'count':
+            return ["{0}".format(a.option_strings[0])] * self.value
+        elif self.kind == 'append':
+            data = []
+            for v in self.value:
+                if v:
+                    data.extend([a.option_strings[0], v])
+            return data
+        elif not a.option_strings:
+            return ["{0}".format(self.value)]
+        elif self.kind == 'store' and a.nargs not in [None, '1']:
+            cmd = ["{0}".format(a.option_strings[0])]
+            cmd.extend(["{0}".format(l) for l in self.value.strip().split(" ")])
+            return cmd
+        return ["{0}".format(a.option_strings[0]), "{0}".format(self.value)]
+
+    def valueFromData(self, data):
+        """
+        convert a value as found in an argparse namespace to the representation of this option
+        """
+        if self.kind == 'const':
+            return None
+        elif self.kind == 'count':
+            if type(data) == type([]):
+                # append_const actions are shown as a count of their const
+                return data.count(self.action.const)
+            return int("{0}".format(data))
+        elif self.kind == 'append':
+            return ["{0}".format(d) for d in data]
+        elif type(data) == type([]):
+            return " ".join(["{0}".format(d) for d in data])
+        return "{0}".format(data)
+
+
+class _SubcommandRecorder(argparse.Action):
+    """
+    stands in for a _SubParsersAction in load parsers: instead of letting the
+    subcommand's parser fill in its defaults, it parses the remaining arguments
+    with the subcommand's model and records (name, namespace) under key
+    """
+    def __init__(self, original, key, childModel):
+        super(_SubcommandRecorder, self).__init__(option_strings=[], dest=argparse.SUPPRESS, nargs=argparse.PARSER,
+                                                  choices=original.choices, required=getattr(original, 'required', False),
+                                                  help=original.help, metavar=original.metavar)
+        self.key = key
+        self.childModel = childModel
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        name = values[0]
+        setattr(namespace, self.key, (name, self.childModel(name).parseArguments(values[1:], None)))
+
+
+class _NotLoadable(argparse.Action):
+    """
+    stands in for -h/--help and --version in load parsers: they would print and
+    exit the program (from the loader thread), so they are reported as a LoadError
+    """
+    def __init__(self, original):
+        super(_NotLoadable, self).__init__(option_strings=original.option_strings, dest=argparse.SUPPRESS,
+                                           nargs=0, help=original.help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        raise argparse.ArgumentError(self, "can't be loaded")
+
+
+def _replaceAction(parser, old, new):
+    parser._actions[parser._actions.index(old)] = new
+    for group in parser._action_groups:
+        if old in group._group_actions:
+            group._group_actions[group._group_actions.index(old)] = new
+    for option_string in old.option_strings:
+        parser._option_string_actions[option_string] = new
+
+
+class _CheckingParsers(dict):
+    """
+    maps subcommand names to checking parsers of the subcommands, made when first used
+    """
+    def __init__(self, parsers):
+        super(_CheckingParsers, self).__init__()
+        self.parsers = parsers
+
+    def __missing__(self, name):
+        parser = self.parsers[name]
+        for other, p in self.parsers.items():
+            # aliases share one parser
+            if p is parser and other in self:
+                checking = self[other]
+                break
+        else:
+            checking = OptionsModel(parser).getCheckingParser()
+        self[name] = checking
+        return checking
+
+
+def _checkingSubparsers(action):
+    """
+    copy of a subparsers action whose subcommand parsers raise ParseError instead of exiting
+    """
+    checking = copy.copy(action)
+    checking._name_parser_map = _CheckingParsers(action._name_parser_map)
+    return checking
+
+
+class OptionsModel(object):
+    """
+    headless state of all options of an argparse parser
+
+    listeners are called as listener(state, origin) whenever a state changes;
+    origin is whatever the caller of the setter passed in, which allows a view
+    to ignore the changes it made itself
+
+    the command line is cached: every state caches its own segment, and a change
+    only invalidates the segment of the state that changed
+
+    schema is the compiled schema of the parser; it is compiled (or taken from
+    the per-process cache) with the given help text settings when not given
+
+    the options of subcommands live in child models, one per subcommand,
+    created when the subcommand is first needed
+    """
+    def __init__(self, parser, schema=None, remove_defaults_from_helptext=False,
+                 helptext_default=' [default=%(default)s]'):
+        self.parser = parser
+        self.helpSettings = remove_defaults_from_helptext, helptext_default
+        self.schema = schema if schema is not None else compileParser(parser, *self.helpSettings)
+        self.cachedCommandLine = None
+        self.checkingParser = None
+        self.converters = ConverterCache()
+        self.childModels = {}
+        self.states = []
+        self.destToStates = {}
+        self.actionToState = {}
+        self.listeners = []
+        self.stateToMutexGroups = {}
+        actions = parserActions(parser)
+        for o in self.schema.options:
+            a = actions[o.position]
+            state = OptionState(a, o)
+            self.states.append(state)
+            self.actionToState[a] = state
+            self.destToStates.setdefault(a.dest, []).append(state)
+        self.indexMutexGroups()
+
+    def indexMutexGroups(self):
+        """
+        precompute which options belong to which mutually exclusive groups, and
+        keep per group the set of its options that are on the command line;
+        this set is updated as states change, so validation does not need to
+        look at the command line at all
+        """
+        self.mutexMembers = []
+        self.mutexPresent = []
+        self.presentMutexStates = set()
+        for g, m in enumerate(self.parser._mutually_exclusive_groups):
+            members = [self.actionToState[a] for a in m._group_actions if a in self.actionToState]
+            self.mutexMembers.append(members)
+            self.mutexPresent.append(set())
+            for state in members:
+                self.stateToMutexGroups.setdefault(state, []).append(g)
+        for state in self.stateToMutexGroups:
+            self.updateMutexPresence(state)
+
+    def updateMutexPresence(self, state):
+        if self.segment(state):
+            self.presentMutexStates.add(state)
+            for g in self.stateToMutexGroups[state]:
+                self.mutexPresent[g].add(state)
+        else:
+            self.presentMutexStates.discard(state)
+            for g in self.stateToMutexGroups[state]:
+                self.mutexPresent[g].discard(state)
+
+    def stateFor(self, action):
+        return self.actionToState[action]
+
+    def addListener(self, listener):
+        self.listeners.append(listener)
+
+    def removeListener(self, listener):
+        self.listeners.remove(listener)
+
+    def notify(self, state, origin=None):
+        state.segment = None
+        self.cachedCommandLine = None
+        if state in self.stateToMutexGroups:
+            self.updateMutexPresence(state)
+        for l in self.listeners:
+            l(state, origin)
+
+    def segment(self, state):
+        """
+        (cached) command line fragment of one option
+        """
+        if state.segment is None:
+            if state.kind == 'subparsers':
+                state.segment = self.subcommandLine(state)
+            else:
+                state.segment = state.commandLine()
+        return state.segment
+
+    def childModel(self, state, name):
+        """
+        the (lazily created) model of subcommand name of a subparsers option;
+        changes in it are reported as changes of state
+        """
+        key = (state, name)
+        if key not in self.childModels:
+            child = OptionsModel(state.action.choices[name], None, *self.helpSettings)
+            child.addListener(lambda childState, origin: self.notify(state, origin))
+            self.childModels[key] = child
+        return self.childModels[key]
+
+    def parsingModel(self, state, name):
+        """
+        a model of subcommand name for parsing arguments, possibly in a worker thread: the
+        child model if it exists, else a throw-away one. Child models are only created when
+        parsed values are applied (by the thread that owns this model)
+        """
+        child = self.childModels.get((state, name))
+        if child is None:
+            child = OptionsModel(state.action.choices[name], None, *self.helpSettings)
+        return child
+
+    def subcommandLine(self, state):
+        """
+        command line fragment of a subparsers option: the selected subcommand and its options
+        """
+        if not state.enabled or state.value not in state.action.choices:
+            return []
+        return [state.value] + self.childModel(state, state.value).makeCommandLine()
+
+    def subcommandKey(self, state):
+        """
+        attribute under which load parsers record the subcommand of a subparsers option
+        """
+        return "==subcommand {0}==".format(state.schema.position)
+
+    def setEnabled(self, state, enabled, origin=None):
+        enabled = bool(enabled)
+        if state.enabled == enabled:
+            return False
+        state.enabled = enabled
+        self.notify(state, origin)
+        return True
+
+    def setValue(self, state, value, origin=None):
+        if state.value == value:
+            return False
+        state.value = value
+        self.notify(state, origin)
+        return True
+
+    def setState(self, state, enabled, value, origin=None):
+        enabled = bool(enabled)
+        if state.enabled == enabled and state.value == value:
+            return False
+        state.enabled = enabled
+        state.value = value
+        self.notify(state, origin)
+        return True
+
+    def makeCommandLine(self):
+        """
+        construct the command line from the option states;
+        only the segments of options that changed since the previous call are rebuilt
+        """
+        if self.cachedCommandLine is None:
+            commandline = []
+            for s in self.states:
+                commandline.extend(self.segment(s))
+            self.cachedCommandLine = commandline
+        return list(self.cachedCommandLine)
+
+    def parse_args(self):
+        """
+        let the parser parse the command line built from the option states
+        """
+        return self.parser.parse_args(self.makeCommandLine())
+
+    def parseCommandLine(self, cmdline):
+        """
+        parse cmdline like the parser would, but raise ParseError instead of exiting
+        when it is invalid (also in subcommands, or when a converter or action exits);
+        touches no option state, so it can run in a worker thread
+        """
+        try:
+            return self.getCheckingParser().parse_args(cmdline)
+        except SystemExit as e:
+            raise ParseError("the parser exited with status {0}".format(e.code))
+
+    def getCheckingParser(self):
+        """
+        copy of the parser that raises ParseError instead of exiting and that converts
+        values through self.converters; converters with side effects (FileType opens
+        files) are left alone
+        """
+        if self.checkingParser is None:
+            helper = self.makeHelperParser(self.parser.fromfile_prefix_chars)
+            helper.error = _raiseParseError
+            for state in self.states:
+                t = state.action.type
+                if t is not None and not isinstance(t, argparse.FileType):
+                    helper.register('type', t, self.converters.wrap(helper._registry_get('type', t, t)))
+                if state.kind == 'subparsers':
+                    _replaceAction(helper, state.action, _checkingSubparsers(state.action))
+            self.checkingParser = helper
+        return self.checkingParser
+
+    def makeHelperParser(self, fromfile_prefix_chars):
+        """
+        parser with the actions of self.parser and the same settings (prefix characters,
+        abbreviations, ...), so it accepts exactly what self.parser accepts
+        """
+        p = self.parser
+        return argparse.ArgumentParser(prog=p.prog, add_help=False, parents=[p], prefix_chars=p.prefix_chars,
+                                       fromfile_prefix_chars=fromfile_prefix_chars,
+                                       argument_default=p.argument_default, conflict_handler=p.conflict_handler,
+                                       allow_abbrev=p.allow_abbrev)
+
+    def needsChecking(self, state):
+        """
+        True if the value of state is free text that its type= converter can reject
+        """
+        t = state.action.type
+        return state.kind in ['store', 'append'] and t is not None and not isinstance(t, argparse.FileType)
+
+    def checkValue(self, state, value=None):
+        """
+        run the type= converter of an option on its current value (or on value, e.g. a copy
+        taken on the GUI thread when checking in a worker thread);
+        returns None if the value is fine, else argparse's error message
+        """
+        if not self.needsChecking(state):
+            return None
+        if value is None:
+            value = state.value
+        if state.kind == 'append':
+            texts = value
+        elif state.action.nargs in [None, '1', '?']:
+            texts = [value]
+        else:
+            texts = value.strip().split(" ")
+        helper = self.getCheckingParser()
+        try:
+            for text in texts:
+                helper._get_value(state.action, text)
+        except argparse.ArgumentError as e:
+            return "{0}".format(e)
+        return None
+
+    def mutexViolations(self, groups=None):
+        """
+        list of (group index, [present states]) for every mutually exclusive group
+        (or every group in groups) with more than one option on the command line
+        """
+        if groups is None:
+            groups = range(len(self.mutexPresent))
+        return [(g, [s for s in self.mutexMembers[g] if s in self.mutexPresent[g]])
+                for g in groups if len(self.mutexPresent[g]) > 1]
+
+    def isMutexViolation(self, state):
+        """
+        True if state is on the command line together with another option of one of its mutex groups
+        """
+        if state not in self.presentMutexStates:
+            return False
+        return any(len(self.mutexPresent[g]) > 1 for g in self.stateToMutexGroups[state])
+
+    def validateMutualExclusiveOptions(self):
+        """
+        check if mutex options specified;
+        returns (True, []) or (False, [option strings of the offending options])
+        """
+        offending_options = []
+        for g, states in self.mutexViolations():
+            offending_options.extend(s.action.option_strings for s in states)
+        return not offending_options, offending_options
+
+    def reset(self, origin=None):
+        """
+        exclude all options from the command line and empty all lists
+        """
+        for s in self.states:
+            self.setState(s, False, [] if s.kind == 'append' else s.value, origin)
+
+    def resetToDefaults(self, origin=None):
+        """
+        restore the states derived from the parser defaults (also in the models of subcommands)
+        """
+        for s in self.states:
+            enabled, value = s.defaultState()
+            self.setState(s, enabled, value, origin)
+        for child in self.childModels.values():
+            child.resetToDefaults(origin)
+
+    def resetToNamespace(self, namespace, origin=None):
+        """
+        restore the parser defaults, except for the options whose value in namespace (e.g. a
+        result of parse_args) differs from their default; only options that change are touched
+        """
+        changes = []
+        for s in self.states:
+            data = getattr(namespace, s.action.dest, None)
+            if s.kind == 'subparsers':
+                continue
+            if data is None or data == s.action.default:
+                enabled, value = s.defaultState()
+            else:
+                enabled, value = self.loadedState(s, self.givenData(s, data))
+            if s.enabled != enabled or s.value != value:
+                changes.append((s, enabled, value))
+        self.applyChanges(changes, origin)
+        for s in self.states:
+            if s.kind != 'subparsers':
+                continue
+            name = getattr(namespace, s.action.dest, None) if s.action.dest is not argparse.SUPPRESS else None
+            if name is None:
+                enabled, value = s.defaultState()
+                self.setState(s, enabled, value, origin)
+            else:
+                self.setState(s, True, name, origin)
+                self.childModel(s, name)
+            for (state, childName), child in list(self.childModels.items()):
+                if state is s and childName == name:
+                    child.resetToNamespace(namespace, origin)
+                elif state is s:
+                    child.resetToDefaults(origin)
+
+    def givenData(self, state, data):
+        """
+        the part of a value parsed by the real parser that was given on the command line:
+        parse_args appends the values of append options to (a copy of) their default
+        """
+        default = state.action.default
+        if state.kind == 'append' and default and isinstance(data, list) and data[:len(default)] == list(default):
+            return data[len(default):]
+        return data
+
+    def namespaceValues(self, namespace):
+        """
+        {dest: value} for setValues from a namespace made by the real parser (e.g. a
+        result of parse_args); attributes of other parsers (e.g. of subcommands) are left out
+        """
+        values = {}
+        for dest, data in vars(namespace).items():
+            states = self.destToStates.get(dest)
+            if states:
+                values[dest] = self.givenData(states[0], data)
+        return values
+
+    def loadedState(self, state, data):
+        """
+        (enabled, value) of an option after loading a parsed value;
+        None means the option was not specified
+        """
+        if data is None or (state.kind == 'const' and data != state.action.const):
+            return False, [] if state.kind == 'append' else state.value
+        return True, state.valueFromData(data)
+
+    def copyActionValues(self, dest, data, origin=None):
+        """
+        update the options that store into dest from a parsed value;
+        None means the option was not specified
+        """
+        for s in self.destToStates.get(dest, []):
+            if s.kind != 'subparsers':
+                enabled, value = self.loadedState(s, data)
+                self.setState(s, enabled, value, origin)
+
+    def namespaceChanges(self, namespace, dests=None):
+        """
+        (state, enabled, value) for every option (of all destinations, or of those
+        in dests) that changes when applying a namespace; subcommands are left out
+        """
+        changes = []
+        for dest in (self.destToStates if dests is None else dests):
+            data = getattr(namespace, dest, None)
+            for s in self.destToStates[dest]:
+                if s.kind == 'subparsers':
+                    continue
+                enabled, value = self.loadedState(s, data)
+                if s.enabled != enabled or s.value != value:
+                    changes.append((s, enabled, value))
+        return changes
+
+    def applyChanges(self, changes, origin=None):
+        """
+        apply the (state, enabled, value) triples computed by namespaceChanges
+        """
+        for s, enabled, value in changes:
+            self.setState(s, enabled, value, origin)
+
+    def values(self):
+        """
+        {dest: value} for every destination: the value of its included option in the
+        representation of OptionState (const options give their const, subcommands their
+        name), or None when none of its options is included
+        """
+        values = {}
+        for s in self.states:
+            dest = s.action.dest
+            if dest is argparse.SUPPRESS and s.kind != 'subparsers':
+                continue
+            if not s.enabled:
+                values.setdefault(dest, None)
+            elif values.get(dest) is None:
+                value = s.action.const if s.kind == 'const' else s.value
+                values[dest] = list(value) if s.kind == 'append' else value
+        return values
+
+    def setValues(self, values, origin=None):
+        """
+        set options from {dest: value} as returned by values() (or as found in a namespace);
+        None excludes the options of a dest. Only the options that change are touched.
+        Unknown destinations raise KeyError and unknown subcommands ValueError, before
+        anything is changed
+        """
+        for dest, data in values.items():
+            for s in self.destToStates[dest]:
+                if s.kind == 'subparsers' and data is not None and data not in s.action.choices:
+                    raise ValueError("unknown subcommand {0!r} for {1}".format(data, dest))
+        namespace = argparse.Namespace()
+        for dest, data in values.items():
+            setattr(namespace, dest, data)
+        self.applyChanges(self.namespaceChanges(namespace, list(values)), origin)
+        for dest, data in values.items():
+            for s in self.destToStates[dest]:
+                if s.kind != 'subparsers':
+                    continue
+                if data is None:
+                    self.setEnabled(s, False, origin)
+                else:
+                    self.setState(s, True, data, origin)
+                    self.childModel(s, data)
+
+    def applyNamespace(self, namespace, origin=None, dests=None):
+        """
+        update all options (or only those storing into dests) from an argparse namespace;
+        only the options that change are touched (and notified)
+        """
+        dests = list(self.destToStates) if dests is None else dests
+        self.applyChanges(self.namespaceChanges(namespace, dests), origin)
+        for dest in dests:
+            for s in self.destToStates[dest]:
+                if s.kind == 'subparsers':
+                    self.copySubcommandValues(s, namespace, origin)
+
+    def copySubcommandValues(self, state, namespace, origin=None):
+        """
+        update a subparsers option and the model of the loaded subcommand from a
+        namespace produced by a load parser
+        """
+        recorded = getattr(namespace, self.subcommandKey(state), None)
+        if recorded is None:
+            self.setEnabled(state, False, origin)
+        else:
+            name, childNamespace = recorded
+            self.setState(state, True, name, origin)
+            self.childModel(state, name).applyNamespace(childNamespace, origin)
+
+    def makeLoadParser(self, fromfile_prefix_chars='@'):
+        """
+        parser that understands argument files and leaves unspecified options at None;
+        it raises LoadError instead of exiting when the arguments are invalid, and does not
+        run type= converters (except for options with choices)
+        """
+        helper = self.makeHelperParser(fromfile_prefix_chars)
+        helper.error = _raiseLoadError
+        # loading keeps the text of the values: converters can be slow or have side effects
+        # (FileType opens, and for 'w' truncates, the file); checking values is the job of the
+        # checking parser. Only values that must be among the choices are converted to compare them
+        convert = helper._get_value
+        helper._get_value = lambda action, text: convert(action, text) if action.choices else text
+        for a in list(helper._actions):
+            if isinstance(a, IGNORED_ACTION_TYPES):
+                _replaceAction(helper, a, _NotLoadable(a))
+        for state in self.states:
+            if state.kind == 'subparsers':
+                recorder = _SubcommandRecorder(state.action, self.subcommandKey(state),
+                                               lambda name, state=state: self.parsingModel(state, name))
+                _replaceAction(helper, state.action, recorder)
+        return helper
+
+    def emptyNamespace(self, parser):
+        """
+        namespace in which every destination is present but None; handing it to
+        parse_args keeps argparse from filling in the defaults, so afterwards only
+        the options that were really specified are not None
+        """
+        namespace = argparse.Namespace()
+        for a in parser._actions:
+            if a.dest is not argparse.SUPPRESS:
+                setattr(namespace, a.dest, None)
+        return namespace
+
+    def parseArguments(self, args, fromfile_prefix_chars='@'):
+        """
+        parse a list of command line arguments (possibly @files)
+        into a namespace holding only the specified options
+        """
+        helper = self.makeLoadParser(fromfile_prefix_chars)
+        return helper.parse_args(args, namespace=self.emptyNamespace(helper))
+
+    def readArgumentFile(self, filename, progress=None, cancelled=None):
+        """
+        split an argument file into arguments the way argparse does for @filename,
+        including nested @files; the file is read line by line, progress(fraction)
+        is called every few thousand lines and cancelled() is polled as often
+        (LoadCancelled is raised when it returns True)
+        """
+        args = []
+        size = max(os.path.getsize(filename), 1)
+        done = 0
+        with io.open(filename) as f:
+            for n, line in enumerate(f):
+                done += len(line)
+                for arg in self.parser.convert_arg_line_to_args(line.rstrip("\r\n")):
+                    if arg[:1] == '@':
+                        args.extend(self.readArgumentFile(arg[1:], None, cancelled))
+                    else:
+                        args.append(arg)
+                if n % 4096 == 4095:
+                    if cancelled is not None and cancelled():
+                        raise LoadCancelled(filename)
+                    if progress is not None:
+                        progress(min(float(done) / size, 1.0))
+        return args
+
+    def parseArgumentFile(self, filename, progress=None, cancelled=None):
+        """
+        read and parse an argument file into a namespace holding only the specified options;
+        raises IOError, LoadError or LoadCancelled. Touches no option state, so it can be
+        called from a worker thread
+        """
+        args = self.readArgumentFile(filename, progress, cancelled)
+        return self.parseArguments(args, fromfile_prefix_chars=None)
+
+    def load(self, filename, origin=None):
+        """
+        load the option states from an argparse argument file;
+        raises IOError or LoadError
+        """
+        self.applyNamespace(self.parseArgumentFile(filename), origin)
+
+    def save(self, filename):
+        """
+        save the command line to an argument file with one argument per line,
+        as understood by argparse's fromfile_prefix_chars; raises IOError
+        """
+        with open(filename, "w") as f:
+            for line in self.makeCommandLine():
+                f.write(line + "\n")
@@ -0,0 +1,210 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+"""
+completing and checking file system paths without blocking the dialog
+
+DirectoryCache keeps the sorted entries of the most recently listed
+directories (bounded in number of directories and in total entries), so
+completing a path is a binary search once its directory was listed.
+PathScanner lists directories and checks argparse.FileType values in a
+worker thread of its own: listing a directory with 100000 entries, or one on a
+slow network drive, never happens on the GUI thread, and checking a FileType
+value never opens the file (argparse.FileType would open it, and create it for
+mode 'w').
+"""
+
+import os
+import stat
+import bisect
+import threading
+import collections
+import concurrent.futures
+
+# directories, and entries over all directories, kept by a DirectoryCache
+MAX_DIRECTORIES = 64
+MAX_ENTRIES = 500000
+
+# completions offered at most for one prefix
+MAX_COMPLETIONS = 200
+
+def splitPath(text):
+    """
+    (directory to list, text up to the entry being typed, prefix of that entry) for a
+    partially typed path; the directory has ~ expanded, the other parts are as typed
+    """
+    seps = os.sep + (os.altsep or "")
+    i = max(text.rfind(s) for s in seps) + 1
+    head, prefix = text[:i], text[i:]
+    directory = os.path.normpath(os.path.expanduser(head)) if head else os.curdir
+    return directory, head, prefix
+
+
+def listDirectory(directory):
+    """
+    sorted entry names of a directory, with os.sep appended to subdirectories
+    """
+    names = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            try:
+                isdir = entry.is_dir()
+            except OSError:
+                isdir = False
+            names.append(entry.name + os.sep if isdir else entry.name)
+    names.sort()
+    return names
+
+
+class DirectoryCache(object):
+    """
+    least recently used listings of directories; safe to use from several threads.
+    A listing is dropped when the modification time of its directory changes
+    """
+    def __init__(self, max_directories=MAX_DIRECTORIES, max_entries=MAX_ENTRIES):
+        self.max_directories = max_directories
+        self.max_entries = max_entries
+        self.listings = collections.OrderedDict()  # directory -> (mtime, names)
+        self.entries = 0
+        self.lock = threading.Lock()
+
+    def get(self, directory):
+        """
+        the cached names of a directory or None; does not touch the file system
+        """
+        with self.lock:
+            listing = self.listings.pop(directory, None)
+            if listing is None:
+                return None
+            self.listings[directory] = listing
+            return listing[1]
+
+    def scan(self, directory):
+        """
+        the names of a directory, listed again if it changed since it was cached
+        (blocks on the file system: call it from a worker thread)
+        """
+        mtime = os.stat(directory).st_mtime
+        with self.lock:
+            listing = self.listings.get(directory)
+        if listing is not None and listing[0] == mtime:
+            return self.get(directory)
+        names = listDirectory(directory)
+        self.put(directory, mtime, names)
+        return names
+
+    def put(self, directory, mtime, names):
+        with self.lock:
+            old = self.listings.pop(directory, None)
+            if old is not None:
+                self.entries -= len(old[1])
+            self.listings[directory] = (mtime, names)
+            self.entries += len(names)
+            while len(self.listings) > 1 and (len(self.listings) > self.max_directories or
+                                              self.entries > self.max_entries):
+                _, (_, dropped) = self.listings.popitem(last=False)
+                self.entries -= len(dropped)
+
+    def clear(self):
+        with self.lock:
+            self.listings.clear()
+            self.entries = 0
+
+
+def completions(names, prefix, limit=MAX_COMPLETIONS):
+    """
+    at most limit of the sorted names that start with prefix; hidden entries
+    are only offered once the prefix starts with a dot
+    """
+    result = []
+    i = bisect.bisect_left(names, prefix)
+    while i < len(names) and len(result) < limit and names[i].startswith(prefix):
+        if prefix or not names[i].startswith("."):
+            result.append(names[i])
+        i += 1
+    return result
+
+
+def checkFileType(filetype, text):
+    """
+    the error argparse.FileType would report for text (None if it would accept it),
+    found with stat and access calls instead of opening the file
+    """
+    if text == "-":
+        return None
+    path = os.path.expanduser(text)
+    mode = filetype._mode
+    try:
+        st = os.stat(path)
+    except OSError:
+        st = None
+    access = (os.R_OK if 'r' in mode else 0) | (os.W_OK if 'r' not in mode or '+' in mode else 0)
+    if st is not None and stat.S_ISDIR(st.st_mode):
+        reason = "Is a directory"
+    elif 'r' in mode and st is None:
+        reason = "No such file or directory"
+    elif 'x' in mode and st is not None:
+        reason = "File exists"
+    elif st is not None:
+        reason = None if os.access(path, access) else "Permission denied"
+    else:
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(directory):
+            reason = "No such file or directory"
+        else:
+            reason = None if os.access(directory, os.W_OK | os.X_OK) else "Permission denied"
+    if reason is None:
+        return None
+    return "can't open '{0}': {1}".format(text, reason)
+
+
+class PathScanner(object):
+    """
+    lists directories (into a DirectoryCache) and checks FileType values in a worker
+    thread of its own, so slow file systems do not hold up parsing; both return futures
+    """
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else DirectoryCache()
+        self.executor = None
+        self.scanning = {}
+
+    def getExecutor(self):
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        return self.executor
+
+    def scan(self, directory):
+        """
+        future of the names of a directory; a listing already under way is shared
+        """
+        future = self.scanning.get(directory)
+        if future is None or future.done():
+            self.scanning = dict((d, f) for d, f in self.scanning.items() if not f.done())
+            future = self.scanning[directory] = self.getExecutor().submit(self.cache.scan, directory)
+            future.directory = directory
+        return future
+
+    def check(self, filetype, text):
+        """
+        future of checkFileType(filetype, text)
+        """
+        return self.getExecutor().submit(checkFileType, filetype, text)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
@@ -0,0 +1,213 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+"""
+a library of named, tagged option sets stored in a local SQLite database
+
+every preset stores its command line, and the options and values it sets are
+kept in an indexed table, so presets can be found by name, tag, option or
+value without reading them all. Presets are grouped per scope (by default the
+prog of the parser), so one database can serve several programs.
+
+Search queries consist of whitespace separated terms that must all match:
+
+    tag:nightly         presets tagged nightly
+    --size              presets that set --size
+    --size=10           presets that set --size to 10
+    anything else       presets whose name contains the term
+"""
+
+import os
+import json
+import time
+import sqlite3
+import collections
+
+Preset = collections.namedtuple('Preset', 'name tags modified')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS presets (
+    id INTEGER PRIMARY KEY,
+    scope TEXT NOT NULL,
+    name TEXT NOT NULL,
+    arguments TEXT NOT NULL,
+    modified REAL NOT NULL,
+    UNIQUE (scope, name)
+);
+CREATE INDEX IF NOT EXISTS presets_modified ON presets (scope, modified);
+CREATE TABLE IF NOT EXISTS preset_tags (
+    preset INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (tag, preset)
+);
+CREATE INDEX IF NOT EXISTS preset_tags_preset ON preset_tags (preset);
+CREATE TABLE IF NOT EXISTS preset_options (
+    preset INTEGER NOT NULL,
+    option TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS preset_options_option ON preset_options (option, value);
+CREATE INDEX IF NOT EXISTS preset_options_preset ON preset_options (preset);
+"""
+
+
+def defaultPath():
+    """
+    location of the preset database when none is given
+    """
+    return os.path.join(os.path.expanduser("~"), ".argparseui", "presets.sqlite")
+
+
+def optionValues(model):
+    """
+    the (option, value) pairs that the enabled options of a model put on the command line,
+    one per option string (so -v and --verbose both find a preset that sets -v/--verbose);
+    positionals are named by their dest, options without a value get an empty value
+    """
+    pairs = []
+    for state in model.states:
+        if not state.enabled or state.kind == 'subparsers':
+            continue
+        a = state.action
+        if state.kind == 'const':
+            values = [""]
+        elif state.kind == 'count':
+            values = ["{0}".format(state.value)]
+        elif state.kind == 'append':
+            values = ["{0}".format(v) for v in state.value if v]
+        else:
+            values = ["{0}".format(state.value)]
+        pairs.extend((option, value) for option in a.option_strings or [a.dest] for value in values)
+    return pairs
+
+
+def parseQuery(query):
+    """
+    split a search query into SQL conditions on presets.id and their parameters
+    """
+    conditions = []
+    parameters = []
+    for term in query.split():
+        if term.startswith("tag:"):
+            conditions.append("id IN (SELECT preset FROM preset_tags WHERE tag = ?)")
+            parameters.append(term[len("tag:"):])
+        elif term.startswith("-") and "=" in term:
+            option, value = term.split("=", 1)
+            conditions.append("id IN (SELECT preset FROM preset_options WHERE option = ? AND value = ?)")
+            parameters.extend([option, value])
+        elif term.startswith("-"):
+            conditions.append("id IN (SELECT preset FROM preset_options WHERE option = ?)")
+            parameters.append(term)
+        else:
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            parameters.append("%{0}%".format(escaped))
+    return conditions, parameters
+
+
+class PresetLibrary(object):
+    """
+    named option sets of one scope, stored in an SQLite database at path
+    (created when missing); use ':memory:' for a throw-away library
+    """
+    def __init__(self, path=None, scope=""):
+        self.path = path if path is not None else defaultPath()
+        self.scope = scope
+        if self.path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(self.path))
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def presetId(self, name):
+        row = self.connection.execute("SELECT id FROM presets WHERE scope = ? AND name = ?",
+                                      (self.scope, name)).fetchone()
+        return row[0] if row is not None else None
+
+    def save(self, name, arguments, tags=(), options=None):
+        """
+        store (or replace) a preset; arguments is the command line as a list of strings,
+        options the (option, value) pairs to index (see optionValues)
+        """
+        with self.connection:
+            old = self.presetId(name)
+            if old is not None:
+                self.deleteId(old)
+            cursor = self.connection.execute(
+                "INSERT INTO presets (scope, name, arguments, modified) VALUES (?, ?, ?, ?)",
+                (self.scope, name, json.dumps(list(arguments)), time.time()))
+            preset = cursor.lastrowid
+            self.connection.executemany("INSERT OR IGNORE INTO preset_tags (preset, tag) VALUES (?, ?)",
+                                        [(preset, t) for t in tags if t])
+            self.connection.executemany("INSERT INTO preset_options (preset, option, value) VALUES (?, ?, ?)",
+                                        [(preset, o, v) for o, v in (options or [])])
+
+    def saveModel(self, name, model, tags=()):
+        """
+        store the current options of an options model as a preset
+        """
+        self.save(name, model.makeCommandLine(), tags, optionValues(model))
+
+    def arguments(self, name):
+        """
+        the command line stored in a preset; raises KeyError for unknown presets
+        """
+        row = self.connection.execute("SELECT arguments FROM presets WHERE scope = ? AND name = ?",
+                                      (self.scope, name)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return json.loads(row[0])
+
+    def tags(self, name):
+        return sorted(t for t, in self.connection.execute(
+            "SELECT tag FROM preset_tags WHERE preset = ?", (self.presetId(name),)))
+
+    def deleteId(self, preset):
+        self.connection.execute("DELETE FROM preset_tags WHERE preset = ?", (preset,))
+        self.connection.execute("DELETE FROM preset_options WHERE preset = ?", (preset,))
+        self.connection.execute("DELETE FROM presets WHERE id = ?", (preset,))
+
+    def delete(self, name):
+        with self.connection:
+            preset = self.presetId(name)
+            if preset is not None:
+                self.deleteId(preset)
+
+    def search(self, query="", limit=200):
+        """
+        the presets matching all terms of query (see the module documentation),
+        most recently modified first
+        """
+        conditions, parameters = parseQuery(query)
+        sql = "SELECT id, name, modified FROM presets WHERE " + " AND ".join(["scope = ?"] + conditions)
+        sql += " ORDER BY modified DESC LIMIT ?"
+        rows = self.connection.execute(sql, [self.scope] + parameters + [limit]).fetchall()
+        tags = collections.defaultdict(list)
+        if rows:
+            ids = [r[0] for r in rows]
+            placeholders = ",".join("?" * len(ids))
+            for preset, tag in self.connection.execute(
+                    "SELECT preset, tag FROM preset_tags WHERE preset IN ({0}) ORDER BY tag".format(placeholders), ids):
+                tags[preset].append(tag)
+        return [Preset(name, tags[preset], modified) for preset, name, modified in rows]
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM presets WHERE scope = ?", (self.scope,)).fetchone()[0]
@@ -0,0 +1,25 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+# Try for Qt5, fall back to Qt4, fail if neither.
+# QtGui always names the module holding the widgets (QtWidgets in Qt5),
+# QtGuiBase the module holding validators, colors and other non-widget classes.
+try:
+    from PyQt5 import QtCore, QtGui as QtGuiBase, QtWidgets as QtGui
+except ImportError:
+    from PyQt4 import QtCore, QtGui
+    QtGuiBase = QtGui
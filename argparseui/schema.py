@@ -0,0 +1,304 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+"""
+compilation of an argparse parser into a compact, immutable schema
+
+everything the dialog needs to know about an action that can be derived from
+the parser alone (option string, kind of editor, type name, wrapped help text,
+kind of validator, kind of path) is computed once and cached per process, keyed by a
+fingerprint of the parser, so opening a dialog for the same parser again
+does not introspect the parser a second time
+"""
+
+import os
+import sys
+import argparse
+import collections
+import textwrap
+
+SINGLE = {
+    'int': 'an integer',
+    'float': 'a floating point number',
+    'str': 'a string',
+    'unicode': 'a unicode string'
+}
+
+MULTIPLE = {
+    'int': '%d integers',
+    'float': '%d floating point numbers',
+    'str': '%d strings',
+    'unicode': '%d unicode strings'
+}
+
+_OR_MORE = {
+    'int': ' or more integers',
+    'float': ' or more floating point numbers',
+    'str': ' or more strings',
+    'unicode': ' or more unicode strings'
+}
+
+KIND_BY_ACTION_TYPE = {
+    argparse._StoreAction: 'store',
+    argparse._StoreConstAction: 'const',
+    argparse._StoreTrueAction: 'const',
+    argparse._StoreFalseAction: 'const',
+    argparse._CountAction: 'count',
+    argparse._AppendAction: 'append',
+    argparse._AppendConstAction: 'count',
+    argparse._SubParsersAction: 'subparsers',
+}
+
+IGNORED_ACTION_TYPES = (argparse._HelpAction, argparse._VersionAction)
+
+# type= converters whose values are paths (besides argparse.FileType and pathlib.Path)
+PATH_TYPES = [os.path.abspath, os.path.expanduser, os.path.realpath, os.path.normpath]
+
+# last words of metavars that announce a path, e.g. metavar="FILE" or metavar="OUTPUT_DIR"
+PATH_METAVAR_WORDS = ["FILE", "FILENAME", "PATH"]
+DIRECTORY_METAVAR_WORDS = ["DIR", "DIRECTORY", "FOLDER"]
+
+# number of compiled schemas kept per process
+CACHE_SIZE = 32
+
+# one compiled action:
+#   position       index of the action in parserActions(parser)
+#   option_string  first option string, None for positional arguments
+#   dest           argparse destination
+#   kind           'const', 'store', 'choice', 'count', 'append' or 'subparsers'
+#   typename       name of the expected type, e.g. 'int'
+#   help           wrapped help text shown in front of the option
+#   typehelp       human readable description of the expected type
+#   validator      'int', 'float' or None
+#   path           'file' (argparse.FileType), 'path' (other paths) or None, see pathKind
+OptionSchema = collections.namedtuple('OptionSchema',
+                                      'position option_string dest kind typename help typehelp validator path')
+
+ParserSchema = collections.namedtuple('ParserSchema', 'fingerprint options')
+
+_cache = collections.OrderedDict()
+
+
+def parserActions(parser):
+    """
+    the actions of a parser in the order in which they are shown
+    """
+    return parser._get_optional_actions() + parser._get_positional_actions()
+
+
+def actionKind(a):
+    """
+    classify an argparse action as 'const', 'store', 'choice', 'count', 'append' or 'subparsers';
+    returns None for actions that have no representation in the ui
+    and raises KeyError for unsupported actions
+    """
+    if isinstance(a, IGNORED_ACTION_TYPES):
+        return None
+    kind = KIND_BY_ACTION_TYPE[type(a)]
+    if kind == 'store' and a.choices:
+        kind = 'choice'
+    return kind
+
+
+def isPathType(t):
+    """
+    True if the type= converter t makes paths
+    """
+    # pathlib is not imported here to keep importing argparseui fast; a parser using
+    # pathlib.Path has imported it already
+    pathlib = sys.modules.get('pathlib')
+    return t in PATH_TYPES or (pathlib is not None and t is pathlib.Path)
+
+
+def pathKind(a):
+    """
+    'file' for argparse.FileType arguments, 'directory' or 'path' for other arguments
+    that take a single path (judged by type= and metavar), None otherwise
+    """
+    if a.choices or a.nargs not in [None, '1', '?']:
+        return None
+    if isinstance(a.type, argparse.FileType):
+        return 'file'
+    word = a.metavar.upper().replace("-", "_").split("_")[-1] if isinstance(a.metavar, str) else None
+    if word in DIRECTORY_METAVAR_WORDS:
+        return 'directory'
+    if isPathType(a.type) or word in PATH_METAVAR_WORDS:
+        return 'path'
+    return None
+
+
+def makeOptionString(a):
+    """
+    extract option strings as defined in argparse parser for use in the dialog
+    """
+    return " ".join(a.option_strings)
+
+
+def makeHelpString(a, remove_defaults_from_helptext=False, helptext_default=' [default=%(default)s]'):
+    """
+    extract help string for argparse parser and for use in the dialog
+    """
+    helpstring = ""
+    if a.help:
+        helpstring += makeOptionString(a) + (" " + a.help)
+    elif a.option_strings:
+        helpstring += (" " + makeOptionString(a))
+    else:
+        helpstring += "positional argument"
+
+    if remove_defaults_from_helptext:
+        helpstring = helpstring.replace(helptext_default, '')
+    return '\n'.join(textwrap.wrap(helpstring, 80))
+
+
+def extractTypename(a):
+    """
+    given an argparse action, find out what datatype it expects
+    and return that as a string (used to create help text)
+    """
+    if isinstance(a.type, type):
+        return a.type.__name__
+    return "{0}".format(a.type)
+
+
+def makeTypeHelp(a):
+    """
+    synthesize a human-readable string to describe the expected datatype
+    """
+    if a.choices:
+        return ""  # no need to explain as options are represented in a combo box
+
+    rawtypename = extractTypename(a)
+    nargs = a.nargs
+
+    if rawtypename in ['int', 'float'] and a.default is not None:
+        typename = ""
+    elif rawtypename == 'None':
+        typename = ""
+    else:
+        try:
+            intargs = int(nargs)
+        except ValueError:
+            intargs = -1
+        except TypeError:
+            intargs = -1
+
+        if nargs == '1':
+            typename = SINGLE.get(rawtypename, rawtypename)
+        elif intargs > 0:
+            if rawtypename in MULTIPLE:
+                typename = MULTIPLE[rawtypename] % intargs
+            else:
+                typename = rawtypename
+        elif nargs == "*":
+            if rawtypename in _OR_MORE:
+                typename = "0" + _OR_MORE[rawtypename]
+            else:
+                typename = rawtypename
+        elif nargs == "+":
+            if rawtypename in _OR_MORE:
+                typename = "1" + _OR_MORE[rawtypename]
+            else:
+                typename = rawtypename
+        else:
+            typename = SINGLE.get(rawtypename, rawtypename)
+
+    return " [" + typename + "]" if typename else ""
+
+
+def validatorKind(a):
+    """
+    'int' or 'float' if values of a can be checked by a simple validator while typing
+    """
+    if not a.choices and a.nargs in [None, '1']:
+        rawtypename = extractTypename(a)
+        if rawtypename in ['int', 'float']:
+            return rawtypename
+    return None
+
+
+def _choicesKey(choices):
+    if isinstance(choices, dict):
+        # subcommands: their parsers are compiled separately
+        return tuple(choices)
+    if choices is None or isinstance(choices, range):
+        return choices
+    try:
+        if len(choices) <= 64:
+            return repr(choices)
+    except TypeError:
+        pass
+    return type(choices), id(choices)
+
+
+def fingerprint(parser, *extra):
+    """
+    hashable summary of everything in the parser that ends up in its schema;
+    extra holds the compile options that influence the schema as well
+    """
+    actions = tuple((type(a), tuple(a.option_strings), a.dest, repr(a.nargs), repr(a.default), repr(a.const),
+                     a.type, a.help, repr(a.metavar), _choicesKey(a.choices))
+                    for a in parserActions(parser))
+    return actions + extra
+
+
+def compileAction(position, a, remove_defaults_from_helptext, helptext_default):
+    """
+    compile one action, returns None for actions that are not shown
+    """
+    try:
+        kind = actionKind(a)
+    except KeyError:
+        print("Unsupported type: {0}\n".format(a))
+        return None
+    if kind is None:
+        return None
+    helpstring = makeHelpString(a, remove_defaults_from_helptext, helptext_default)
+    return OptionSchema(position, a.option_strings[0] if a.option_strings else None, a.dest, kind,
+                        extractTypename(a), helpstring, makeTypeHelp(a) if kind in ['store', 'choice'] else "",
+                        validatorKind(a), pathKind(a) if kind == 'store' else None)
+
+
+def _compile(parser, key, remove_defaults_from_helptext, helptext_default):
+    options = (compileAction(i, a, remove_defaults_from_helptext, helptext_default)
+               for i, a in enumerate(parserActions(parser)))
+    return ParserSchema(key, tuple(o for o in options if o is not None))
+
+
+def compileParser(parser, remove_defaults_from_helptext=False, helptext_default=' [default=%(default)s]'):
+    """
+    return the (cached) schema of a parser
+    """
+    key = fingerprint(parser, remove_defaults_from_helptext, helptext_default)
+    try:
+        schema = _cache.pop(key)
+    except KeyError:
+        schema = _compile(parser, key, remove_defaults_from_helptext, helptext_default)
+    except TypeError:
+        # unhashable ingredients (e.g. an unhashable type= callable): do not cache
+        return _compile(parser, None, remove_defaults_from_helptext, helptext_default)
+    _cache[key] = schema
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return schema
+
+
+def clearCache():
+    """
+    forget all compiled schemas
+    """
+    _cache.clear()
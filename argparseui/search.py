@@ -0,0 +1,152 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+"""
+searching the options of a parser
+
+OptionIndex is built once from the option states of a model. It splits the
+option strings, dest, help text, type name and (the first thousand) choices of
+every option into lowercase tokens, and indexes the tokens by their trigrams (plus a sorted token
+list for prefix lookups of one and two letter words). A query matches the
+options that, for every word in it, have a token containing that word.
+"""
+
+import bisect
+import itertools
+
+# characters stripped from the ends of tokens, e.g. in "(default: 3)," or "[a|b]"
+PUNCTUATION = "()[]{}<>,;:.!?'\"|"
+
+# at most this many choices of an option are indexed (choices can be huge lazy ranges)
+MAX_INDEXED_CHOICES = 1000
+
+# number of single-word results kept; typing a longer word narrows down the
+# result of the word typed before instead of searching the index again
+WORD_CACHE_SIZE = 256
+
+
+def tokenize(text):
+    """
+    set of the lowercase tokens of a text
+    """
+    tokens = set(t.strip(PUNCTUATION) for t in text.lower().split())
+    tokens.discard("")
+    return tokens
+
+
+def stateText(state, max_choices=MAX_INDEXED_CHOICES):
+    """
+    all text under which an option can be found
+    """
+    a = state.action
+    parts = list(a.option_strings)
+    parts.extend(["{0}".format(a.dest), state.schema.help, state.schema.typename or ""])
+    if a.choices:
+        parts.extend("{0}".format(c) for c in itertools.islice(a.choices, max_choices))
+    return " ".join(parts)
+
+
+class OptionIndex(object):
+    """
+    prefix and trigram index over the options of a model; rows are positions in model.states
+    """
+    def __init__(self, states, max_choices=MAX_INDEXED_CHOICES):
+        self.rowCount = len(states)
+        self.tokenRows = {}
+        for row, state in enumerate(states):
+            for token in tokenize(stateText(state, max_choices)):
+                rows = self.tokenRows.get(token)
+                if rows is None:
+                    self.tokenRows[token] = rows = set()
+                rows.add(row)
+        self.tokens = sorted(self.tokenRows)
+        self.trigrams = {}
+        trigrams = self.trigrams
+        for token in self.tokens:
+            for i in range(len(token) - 2):
+                g = token[i:i + 3]
+                tokens = trigrams.get(g)
+                if tokens is None:
+                    trigrams[g] = tokens = set()
+                tokens.add(token)
+        self.wordCache = {}
+
+    def prefixTokens(self, prefix):
+        """
+        tokens that start with prefix
+        """
+        i = bisect.bisect_left(self.tokens, prefix)
+        j = i
+        while j < len(self.tokens) and self.tokens[j].startswith(prefix):
+            j += 1
+        return self.tokens[i:j]
+
+    def substringTokens(self, word):
+        """
+        tokens that contain word (at least three characters)
+        """
+        candidates = None
+        for i in range(len(word) - 2):
+            tokens = self.trigrams.get(word[i:i + 3])
+            if not tokens:
+                return []
+            candidates = set(tokens) if candidates is None else candidates & tokens
+        return [token for token in candidates if word in token]
+
+    def wordTokens(self, word):
+        """
+        tokens matching word: containing it, or starting with it for words shorter than
+        three characters. When a shorter prefix of word was looked up before (with the same
+        kind of match), its tokens are narrowed down instead of searching the index
+        """
+        for n in range(len(word) - 1, 0, -1):
+            cached = self.wordCache.get(word[:n])
+            if cached is not None and (n >= 3 or len(word) < 3):
+                if len(word) < 3:
+                    return [t for t in cached[0] if t.startswith(word)]
+                return [t for t in cached[0] if word in t]
+        return self.prefixTokens(word) if len(word) < 3 else self.substringTokens(word)
+
+    def wordRows(self, word):
+        """
+        rows having a token that matches word (see wordTokens)
+        """
+        cached = self.wordCache.get(word)
+        if cached is None:
+            tokens = self.wordTokens(word)
+            rows = set()
+            for token in tokens:
+                rows.update(self.tokenRows[token])
+            if len(self.wordCache) >= WORD_CACHE_SIZE:
+                self.wordCache.clear()
+            cached = self.wordCache[word] = tokens, rows
+        return cached[1]
+
+    def match(self, query):
+        """
+        the set of rows matching every word of query, or None if query has no words
+        (i.e. everything matches)
+        """
+        words = sorted(tokenize(query), key=len, reverse=True)
+        if not words:
+            return None
+        rows = None
+        for word in words:
+            rows = set(self.wordRows(word)) if rows is None else rows & self.wordRows(word)
+            if not rows:
+                break
+        return rows
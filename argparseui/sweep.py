@@ -0,0 +1,252 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+"""
+parameter sweeps: many command lines from one set of options
+
+the value of an enabled option can be a set or a range instead of a single value:
+
+    {a,b,c}          each of a, b and c
+    {1..10}          1, 2, ..., 10
+    {0..1..0.25}     0, 0.25, 0.5, 0.75, 1
+
+and options can be swept as a whole (see Sweep): flags and other options then
+appear both left out and included, and options with choices take every choice.
+
+Sweep streams the Cartesian product of all alternatives as command lines (or
+parsed namespaces) without ever materializing it; combinations that put two
+options of a mutually exclusive group on the command line are pruned as soon
+as the conflict arises, so whole subtrees of the product are skipped.
+"""
+
+import re
+import collections
+
+from collections.abc import Sequence
+from shlex import quote
+
+from .model import OptionState, ParseError
+
+SWEEP_EXPRESSION = re.compile(r"^\{(.*)\}$")
+NUMBER = r"\s*([-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)\s*"
+RANGE_EXPRESSION = re.compile(r"^{0}\.\.{0}(?:\.\.{0})?$".format(NUMBER))
+
+# one dimension of a sweep: the option state, whether the option is also tried
+# left out (off), and the (lazy) sequence of values it takes when included
+Axis = collections.namedtuple('Axis', 'state off values')
+
+
+def parseNumber(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+class FloatRange(Sequence):
+    """
+    inclusive range of floats, computed on the fly (start + i * step avoids accumulating rounding errors)
+    """
+    def __init__(self, start, stop, step):
+        self.start = start
+        self.step = step
+        self.length = max(0, int((stop - start) / step + 1e-9) + 1)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.length))]
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError(i)
+        return self.start + i * self.step
+
+
+class FormattedSequence(Sequence):
+    """
+    lazy view of a sequence with every element formatted as a string
+    """
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        return "{0}".format(self.values[i])
+
+
+def expandValue(text):
+    """
+    the values of a sweep expression as a (lazy) sequence of strings,
+    or None if text is not a sweep expression; raises ValueError for bad ranges
+    """
+    m = SWEEP_EXPRESSION.match("{0}".format(text).strip())
+    if m is None:
+        return None
+    inner = m.group(1)
+    r = RANGE_EXPRESSION.match(inner)
+    if r is None:
+        return [v.strip() for v in inner.split(",")]
+    start, stop = parseNumber(r.group(1)), parseNumber(r.group(2))
+    step = parseNumber(r.group(3)) if r.group(3) is not None else 1
+    if step == 0:
+        raise ValueError("sweep range {0} has step 0".format(text))
+    if stop < start and step > 0:
+        step = -step
+    if all(isinstance(n, int) for n in [start, stop, step]):
+        return FormattedSequence(range(start, stop + (1 if step > 0 else -1), step))
+    return FormattedSequence(FloatRange(start, stop, step))
+
+
+class Sweep(object):
+    """
+    all command lines spanned by the options of a model; swept holds the states
+    that are swept as a whole: they are tried left out and included, and options
+    with choices are tried with every choice. Enabled store options whose value is
+    a sweep expression take every value of the expression. Subcommands are not swept.
+    """
+    def __init__(self, model, swept=()):
+        self.model = model
+        self.axes = []
+        self.axisIndex = {}
+        for state in model.states:
+            axis = self.makeAxis(state, state in swept)
+            if axis is not None:
+                self.axisIndex[state] = len(self.axes)
+                self.axes.append(axis)
+        # the command line between the axes: chunks[i] precedes axes[i], chunks[-1] ends it
+        self.chunks = [[]]
+        self.baseCounts = [0] * len(model.mutexMembers)
+        for state in model.states:
+            if state in self.axisIndex:
+                self.chunks.append([])
+                continue
+            segment = model.segment(state)
+            self.chunks[-1].extend(segment)
+            if segment:
+                for g in model.stateToMutexGroups.get(state, []):
+                    self.baseCounts[g] += 1
+        self.scratch = [OptionState(a.state.action, a.state.schema) for a in self.axes]
+
+    def makeAxis(self, state, swept):
+        if state.kind == 'subparsers':
+            return None
+        values = None
+        if state.kind == 'choice' and swept:
+            values = FormattedSequence(state.action.choices)
+        elif state.kind in ['store', 'choice'] and (state.enabled or swept):
+            values = expandValue(state.value)
+        if values is None:
+            if not swept:
+                return None
+            values = [state.value]
+        return Axis(state, swept and state.kind != 'choice', values)
+
+    def size(self):
+        """
+        number of combinations before pruning mutually exclusive options
+        """
+        n = 1
+        for axis in self.axes:
+            n *= len(axis.values) + (1 if axis.off else 0)
+        return n
+
+    def segment(self, i, enabled, value):
+        scratch = self.scratch[i]
+        scratch.enabled = enabled
+        scratch.value = value if enabled or scratch.kind != 'append' else []
+        return scratch.commandLine()
+
+    def alternatives(self, i, blocked):
+        """
+        (segment, present) for every alternative of axis i; blocked (by another option
+        of a mutually exclusive group) leaves out the alternatives that include the option
+        """
+        axis = self.axes[i]
+        if axis.off:
+            yield self.segment(i, False, None), False
+        if blocked:
+            return
+        for value in axis.values:
+            segment = self.segment(i, True, value)
+            yield segment, bool(segment)
+
+    def commandLines(self):
+        """
+        generator of all command lines of the sweep (lists of strings)
+        """
+        if any(c > 1 for c in self.baseCounts):
+            return
+        counts = list(self.baseCounts)
+        chosen = [None] * len(self.axes)
+        groups = [self.model.stateToMutexGroups.get(a.state, []) for a in self.axes]
+
+        def walk(i):
+            if i == len(self.axes):
+                cmdline = list(self.chunks[0])
+                for segment, chunk in zip(chosen, self.chunks[1:]):
+                    cmdline.extend(segment)
+                    cmdline.extend(chunk)
+                yield cmdline
+                return
+            blocked = any(counts[g] for g in groups[i])
+            for segment, present in self.alternatives(i, blocked):
+                chosen[i] = segment
+                if present:
+                    for g in groups[i]:
+                        counts[g] += 1
+                for cmdline in walk(i + 1):
+                    yield cmdline
+                if present:
+                    for g in groups[i]:
+                        counts[g] -= 1
+
+        for cmdline in walk(0):
+            yield cmdline
+
+    def namespaces(self):
+        """
+        generator of the parsed namespaces of all command lines of the sweep;
+        raises model.ParseError (naming the command line) for a command line the
+        parser rejects, also when the rejection comes from a subcommand
+        """
+        for cmdline in self.commandLines():
+            try:
+                namespace = self.model.parseCommandLine(cmdline)
+            except ParseError as e:
+                raise ParseError("{0}: {1}".format(" ".join(quote(a) for a in cmdline), e))
+            yield namespace
+
+    def write(self, f, cancelled=None):
+        """
+        write one shell-quoted command line per line to a file object (or filename);
+        cancelled() is polled between lines; returns the number of lines written
+        """
+        if not hasattr(f, "write"):
+            with open(f, "w") as fobj:
+                return self.write(fobj, cancelled)
+        n = 0
+        for cmdline in self.commandLines():
+            if cancelled is not None and cancelled():
+                break
+            f.write(" ".join(quote(a) for a in cmdline) + "\n")
+            n += 1
+        return n
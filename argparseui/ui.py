@@ -16,26 +16,33 @@
 ##############################################################################
 
 import re
-import textwrap
+import time
 import argparse
-
-# Try for Qt5, fall back to Qt4, fail if neither.
-try:
-    from PyQt5 import QtCore, QtWidgets as QtGui
-except ImportError:
-    from PyQt4 import QtCore, QtGui
-
-__VERSION__ = "0.0.5"
+import sqlite3
+import contextlib
+import collections
+import concurrent.futures
+
+from .qt import QtCore, QtGui, QtGuiBase
+from .model import OptionsModel, LoadError
+from .presets import PresetLibrary
+from .search import OptionIndex
+from .sweep import Sweep, expandValue
+from .paths import DirectoryCache, PathScanner
+from .widgets import ChoicesEditor, CollapsibleSection, ListEditor, PathEditor, PresetPanel
+from .loader import ArgumentFileLoader, BatchApplier
+from .launcher import Launcher, LaunchPanel
+from .journal import Autosave
+from .instrumentation import actionTypeName, elapsed, timed
+from . import schema
+from .version import __VERSION__
 
 
 def comb(str1, str2):
     return str1 + str2
 
 
-try:
-    _find_unsafe = re.compile(r'[^\w@%+=:,./-]', re.ASCII).search
-except:
-    _find_unsafe = re.compile(r'[^\w@%+=:,./-]').search
+_find_unsafe = re.compile(r'[^\w@%+=:,./-]', re.ASCII).search
 
 
 def quote(s):
@@ -49,44 +56,120 @@ def quote(s):
     return "'" + s.replace("'", "'\"'\"'") + "'"
 
 
-SINGLE = {
-    'int': 'an integer',
-    'float': 'a floating point number',
-    'str': 'a string',
-    'unicode': 'a unicode string'
+# (method, detail, is a slot) for all methods reported to the instrumentation hook
+INSTRUMENTED_METHODS = [
+    ('create_ui', None, False),
+    ('createItemView', None, False),
+    ('makeStoreConstEntry', actionTypeName, False),
+    ('makeStoreActionEntry', actionTypeName, False),
+    ('makeCountActionEntry', actionTypeName, False),
+    ('makeAppendActionEntry', actionTypeName, False),
+    ('makeSubParsersEntry', actionTypeName, False),
+    ('showSubcommandPage', None, False),
+    ('makeCommandLine', None, False),
+    ('validateMutualExclusiveOptions', None, False),
+    ('validatePendingValues', None, False),
+    ('onLoad', None, True),
+    ('loadFile', None, False),
+    ('resetAllWidgets', None, False),
+    ('copyActionValuesToUi', actionTypeName, False),
+    ('onSave', None, True),
+    ('loadPreset', None, False),
+    ('parse_args', None, False),
+]
+
+# use_filter_box=None shows the filter box for parsers with at least this many options
+FILTER_BOX_MIN_OPTIONS = 20
+
+VALIDATORS = {
+    'int': QtGuiBase.QIntValidator,
+    'float': QtGuiBase.QDoubleValidator
 }
 
-MULTIPLE = {
-    'int': '%d integers',
-    'float': '%d floating point numbers',
-    'str': '%d strings',
-    'unicode': '%d unicode strings'
-}
-
-_OR_MORE = {
-    'int': ' or more integers',
-    'float': ' or more floating point numbers',
-    'str': ' or more strings',
-    'unicode': ' or more unicode strings'
-}
+# directory listings for path completion, shared by all dialogs of the process
+DIRECTORY_CACHE = DirectoryCache()
 
 
 class ArgparseUi(QtGui.QDialog):
+    # results of parse_args_async, delivered on the GUI thread
+    argsParsed = QtCore.pyqtSignal(object)
+    parseFailed = QtCore.pyqtSignal(str)
+    # internal: carries a finished future from the worker thread to the GUI thread
+    parseDone = QtCore.pyqtSignal(object)
+    # internal: carries the finished future of writing a sweep to the GUI thread
+    sweepDone = QtCore.pyqtSignal(object)
+    # internal: carries the finished future of checking a value to the GUI thread
+    valueChecked = QtCore.pyqtSignal(object)
+    # internal: carries (function, args, future) from any thread to the GUI thread, see callInGuiThread
+    callRequested = QtCore.pyqtSignal(object)
+
     def __init__(self, parser, use_scrollbars=False, remove_defaults_from_helptext=False,
                  helptext_default=' [default=%(default)s]', use_save_load_button=False, window_title="Make your choice",
-                 left_label_alignment=None, ok_button_handler=None, cancel_button_handler=None, parent=None):
+                 left_label_alignment=None, ok_button_handler=None, cancel_button_handler=None, use_item_view=False,
+                 options_model=None, embedded=False, instrumentation=None, preset_library=None,
+                 use_filter_box=None, use_sweep_button=False, launch_command=None, launch_function=None,
+                 max_parallel_runs=2, autosave=None, expanded_groups=None, use_preview=False, parent=None):
         super(ArgparseUi, self).__init__(parent)
+        self.instrumentation = instrumentation  # function taking (phase, detail, seconds), see instrumentation.py
+        if instrumentation is not None:
+            self.instrument(instrumentation)
         self.setWindowTitle(window_title)
         self.parser = parser
         self.use_scrollbars = use_scrollbars
         self.remove_defaults_from_helptext = remove_defaults_from_helptext
         self.helptext_default = helptext_default
         self.use_save_load_button = use_save_load_button
+        self.use_item_view = use_item_view
+        self.left_label_alignment = left_label_alignment
+        self.embedded = embedded
         self.ok_button_handler = ok_button_handler  # function that takes two options: the ArgparseUi instance and "parsed options"
         self.cancel_button_handler = cancel_button_handler  # function that takes one option: the ArgparseUi instance
-        self.commandLineArgumentCreators = []
         self.filename = None
-        self.destToWidget = {}
+        self.loader = None
+        self.applier = None
+        self.executor = None
+        self.sweepExecutor = None
+        self.pendingOk = None
+        self.parsedArgs = None
+        self.pendingValidation = set()
+        self.validationTimer = QtCore.QTimer(self)
+        self.validationTimer.setSingleShot(True)
+        self.validationTimer.setInterval(300)
+        self.validationTimer.timeout.connect(self.validatePendingValues)
+        self.stateToWidgets = {}
+        self.subcommandPages = {}
+        if preset_library is not None and not isinstance(preset_library, PresetLibrary):
+            preset_library = PresetLibrary(preset_library, parser.prog)
+        self.presetLibrary = preset_library
+        self.presetPanel = None
+        self.optionIndex = None
+        self.rowWidgets = None
+        self.hiddenStates = set()
+        self.use_sweep_button = use_sweep_button and not embedded
+        self.sweepMode = False
+        self.sweptStates = set()
+        self.sweepValidators = {}
+        self.sweepProgress = None
+        self.launcher = None
+        self.launchPanel = None
+        self.autosave = None
+        self.expanded_groups = expanded_groups
+        self.sections = []
+        self.preview = None
+        self.pathScanner = None
+        self.batchDepth = 0
+        self.batchedStates = collections.OrderedDict()
+        if options_model is None:
+            t0 = time.perf_counter()
+            options_model = OptionsModel(parser, None, remove_defaults_from_helptext, helptext_default)
+            if instrumentation is not None:
+                elapsed(instrumentation, 'create_model', t0)
+        self.model = options_model
+        self.schema = self.model.schema
+        if (launch_command is not None or launch_function is not None) and not embedded:
+            self.launcher = Launcher(launch_command, launch_function, max_parallel_runs,
+                                     self.model.parseCommandLine, self.getExecutor(), self)
+        self.model.addListener(self.onStateChanged)
 
         self.mainLayout = QtGui.QVBoxLayout(self)
         self.setLayout(self.mainLayout)
@@ -100,6 +183,7 @@ class ArgparseUi(QtGui.QDialog):
         if left_label_alignment is not None:
             self.optionsLayout.setLabelAlignment(QtCore.Qt.AlignLeft if left_label_alignment else QtCore.Qt.AlignRight)
         self.options.setLayout(self.optionsLayout)
+        self.formLayouts = [self.optionsLayout]
 
         self.buttons = QtGui.QWidget(self)
         self.buttonsLayout = QtGui.QHBoxLayout(self.buttons)
@@ -119,19 +203,60 @@ class ArgparseUi(QtGui.QDialog):
           self.SaveButton = self.addButton("Save options")
           self.SaveAsButton = self.addButton("Save options as")
 
+        if self.presetLibrary is not None:
+          self.PresetsButton = self.addButton("Presets")
+          self.PresetsButton.setCheckable(True)
+
+        if self.launcher is not None:
+          self.RunButton = self.addButton("Run")
+
+        if self.use_sweep_button:
+          self.SweepButton = self.addButton("Sweep mode")
+          self.SweepButton.setCheckable(True)
+          self.SaveSweepButton = self.addButton("Save sweep as")
+          self.SaveSweepButton.setEnabled(False)
+
         self.buttonsLayout.addSpacerItem(QtGui.QSpacerItem(20, 1, QtGui.QSizePolicy.Expanding, QtGui.QSizePolicy.Minimum))
 
         self.OkButton.clicked.connect(self.onOk)
+        # always queued, so results are delivered after parse_args_async returned
+        self.parseDone.connect(self.onParseDone, QtCore.Qt.QueuedConnection)
+        self.valueChecked.connect(self.onValueChecked, QtCore.Qt.QueuedConnection)
+        self.callRequested.connect(self.onCallRequested, QtCore.Qt.QueuedConnection)
         self.CancelButton.clicked.connect(self.onCancel)
         if self.use_save_load_button:
           self.LoadButton.clicked.connect(self.onLoad)
           self.SaveButton.clicked.connect(self.onSave)
           self.SaveAsButton.clicked.connect(self.onSaveAs)
+        if self.presetLibrary is not None:
+          self.PresetsButton.toggled.connect(self.showPresets)
+        if self.launcher is not None:
+          self.RunButton.clicked.connect(self.onRun)
+        if self.use_sweep_button:
+          self.SweepButton.toggled.connect(self.setSweepMode)
+          self.SaveSweepButton.clicked.connect(self.onSaveSweep)
+          self.sweepDone.connect(self.onSweepDone, QtCore.Qt.QueuedConnection)
 
         self.create_ui()
 
+        self.autosaveSetting = autosave if not embedded else None
+        self.autosaveDirectory = None if autosave is True else autosave
+        if self.autosaveSetting:
+            self.autosave = Autosave(self.model, self.autosaveDirectory)
+            # asked once the event loop runs, so constructing the dialog never blocks
+            QtCore.QTimer.singleShot(0, self.startAutosave)
+
         self.mainLayout.addWidget(self.description)
-        if self.use_scrollbars:
+        if use_filter_box is None:
+            use_filter_box = len(self.model.states) >= FILTER_BOX_MIN_OPTIONS
+        self.filterBox = None
+        if use_filter_box and not self.embedded:
+            self.filterBox = QtGui.QLineEdit(self)
+            self.filterBox.setPlaceholderText("filter options")
+            self.filterBox.textChanged.connect(self.filterOptions)
+            self.mainLayout.addWidget(self.filterBox)
+            self.optionIndex = self.getExecutor().submit(OptionIndex, self.model.states)
+        if self.use_scrollbars and not self.use_item_view:
             self.scrollableArea = QtGui.QScrollArea(self)
             self.scrollableArea.setWidgetResizable(True)
             self.scrollableArea.setEnabled(True)
@@ -144,8 +269,39 @@ class ArgparseUi(QtGui.QDialog):
         else:
             self.mainLayout.addWidget(self.options)
         self.mainLayout.addWidget(self.epilog)
+        if use_preview and not self.embedded:
+            self.mainLayout.addWidget(self.makePreview())
+        self.presetsPosition = self.mainLayout.count()
         self.mainLayout.addWidget(self.buttons)
 
+        if self.embedded:
+            # used as the page of a subcommand inside another dialog
+            self.setWindowFlags(QtCore.Qt.Widget)
+            self.mainLayout.setContentsMargins(0, 0, 0, 0)
+            for w in [self.description, self.epilog, self.buttons]:
+                w.hide()
+
+    def instrument(self, hook):
+        """
+        replace the instrumented methods of this instance by versions that report their
+        duration to hook; also reports the time from showing the dialog to its first paint
+        """
+        for name, detail, slot in INSTRUMENTED_METHODS:
+            setattr(self, name, timed(hook, name, getattr(self, name), detail, slot))
+        self.shownAt = None
+        self.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        """
+        only installed when instrumented
+        """
+        if obj is self and event.type() == QtCore.QEvent.Show:
+            self.shownAt = time.perf_counter()
+        elif obj is self and event.type() == QtCore.QEvent.Paint and self.shownAt is not None:
+            elapsed(self.instrumentation, 'show_to_first_paint', self.shownAt)
+            self.shownAt = None
+        return super(ArgparseUi, self).eventFilter(obj, event)
+
     def addButton(self, label):
       self.buttonsLayout.addSpacerItem(QtGui.QSpacerItem(20, 1, QtGui.QSizePolicy.Expanding, QtGui.QSizePolicy.Minimum))
       b = QtGui.QPushButton(label, self.buttons)
@@ -165,34 +321,110 @@ class ArgparseUi(QtGui.QDialog):
         """
         self.addDescription()
         self.actionLookupTable = {
-            type(argparse._HelpAction(None)): self.makeHelpActionEntry,
-            type(argparse._VersionAction(None)): self.makeHelpActionEntry,
-            type(argparse._StoreAction(None, None, None)): self.makeStoreConstEntry,
-            type(argparse._StoreConstAction(None, None, None)): self.makeStoreConstEntry,
-            type(argparse._StoreTrueAction(None, None)): self.makeStoreConstEntry,
-            type(argparse._StoreFalseAction(None, None)): self.makeStoreConstEntry,
-            type(argparse._StoreAction(None, None)): self.makeStoreActionEntry,
-            type(argparse._CountAction(None, None)): self.makeCountActionEntry,
-            type(argparse._AppendAction(None, None)): self.makeAppendActionEntry,
-            type(argparse._AppendConstAction(None, None, None)): self.makeCountActionEntry
+            argparse._HelpAction: self.makeHelpActionEntry,
+            argparse._VersionAction: self.makeHelpActionEntry,
+            argparse._StoreConstAction: self.makeStoreConstEntry,
+            argparse._StoreTrueAction: self.makeStoreConstEntry,
+            argparse._StoreFalseAction: self.makeStoreConstEntry,
+            argparse._StoreAction: self.makeStoreActionEntry,
+            argparse._CountAction: self.makeCountActionEntry,
+            argparse._AppendAction: self.makeAppendActionEntry,
+            argparse._AppendConstAction: self.makeCountActionEntry,
+            argparse._SubParsersAction: self.makeSubParsersEntry
         }
 
-        for a in self.parser._get_optional_actions():
-            try:
-                self.actionLookupTable[type(a)](a, optional=True)
-                # print("Introspected type: {0}\n".format(a))
-            except KeyError:
-                print("Unsupported type: {0}\n".format(a))
-
-        for a in self.parser._get_positional_actions():
-            try:
-                self.actionLookupTable[type(a)](a, optional=True)
-                # print("Introspected type: {0}\n".format(a))
-            except KeyError:
-                print("Unsupported type: {0}\n".format(a))
+        if self.use_item_view:
+            self.createItemView()
+        elif self.hasArgumentGroups():
+            self.createSections()
+        else:
+            self.makeEntries(self.model.states)
 
         self.addEpilog()
 
+    def makeEntries(self, states):
+        """
+        add the widgets of the given options to the options layout
+        """
+        for state in states:
+            self.actionLookupTable[type(state.action)](state.action, optional=True)
+        for state in states:
+            if state in self.model.stateToMutexGroups:
+                self.markMutexViolation(state)
+
+    def hasArgumentGroups(self):
+        """
+        True if the parser has argument groups besides the default ones
+        """
+        return len(self.parser._action_groups) > 2
+
+    def createSections(self):
+        """
+        one collapsible section per argument group (made with add_argument_group); the widgets
+        of a section are only built when it is first expanded. expanded_groups lists the titles
+        of the groups that start expanded (all of them if None). Options that were never built
+        keep their defaults in the model, so they still end up on the command line
+        """
+        groupOf = {}
+        for g in self.parser._action_groups:
+            for a in g._group_actions:
+                groupOf.setdefault(a, g)
+        groupStates = collections.OrderedDict((g, []) for g in self.parser._action_groups)
+        for state in self.model.states:
+            groupStates[groupOf.get(state.action, self.parser._action_groups[0])].append(state)
+        for g, states in groupStates.items():
+            if not states:
+                continue
+            section = CollapsibleSection(g.title, g.description, self.left_label_alignment, self.options)
+            section.states = states
+            section.expandedChanged.connect(lambda expanded, section=section: self.expandSection(section, expanded))
+            self.optionsLayout.addRow(section)
+            self.sections.append(section)
+            if self.expanded_groups is None or g.title in self.expanded_groups:
+                section.setExpanded(True)
+
+    def expandSection(self, section, expanded):
+        """
+        build the widgets of a section when it is expanded for the first time
+        """
+        if not expanded or section.built:
+            return
+        section.built = True
+        saved = self.options, self.optionsLayout
+        self.options, self.optionsLayout = section.body, section.bodyLayout
+        try:
+            self.makeEntries(section.states)
+        finally:
+            self.options, self.optionsLayout = saved
+        self.formLayouts.append(section.bodyLayout)
+        self.rowWidgets = None
+        if self.sweepMode:
+            self.setSweepMode(True)
+        if self.hiddenStates:
+            # the new rows are visible: let the filter hide the ones it hides
+            self.hiddenStates -= set(section.states)
+            self.filterOptions(self.filterBox.text())
+
+    def createItemView(self):
+        """
+        alternative to the widget-per-option form: show all options in a single
+        table view; editors are only created for the cell that is being edited,
+        so the cost of opening the dialog does not grow with the number of options
+        """
+        from .itemview import ActionsTableModel, makeActionsView
+        self.optionsModel = ActionsTableModel(self.model, self.makeItemLabel, self)
+        self.optionsView = makeActionsView(self.optionsModel, self.getStateValidator, self.options)
+        self.optionsLayout.addRow(self.optionsView)
+        for state in self.model.states:
+            if state.kind == 'subparsers':
+                self.optionsLayout.addRow(self.makeSubcommandPages(state))
+
+    def makeItemLabel(self, state):
+        """
+        label of an option in the item view
+        """
+        return comb(state.schema.help, state.schema.typehelp)
+
     def addDescription(self):
         """
         add a description above the ui
@@ -219,98 +451,38 @@ class ArgparseUi(QtGui.QDialog):
         """
         extract help string for argparse parser and for use in the dialog
         """
-        helpstring = ""
-        if a.help:
-            helpstring += self.makeOptionString(a) + (" " + a.help)
-        elif a.option_strings:
-            helpstring += (" " + self.makeOptionString(a))
-        else:
-            helpstring += "positional argument"
-
-        if self.remove_defaults_from_helptext:
-            helpstring = helpstring.replace(self.helptext_default, '')
-        return '\n'.join(textwrap.wrap(helpstring, 80))
+        return schema.makeHelpString(a, self.remove_defaults_from_helptext, self.helptext_default)
 
     def makeOptionString(self, a):
         """
         extract option strings as defined in argparse parser for use in the dialog
         """
-        the_options = " ".join(a.option_strings)
-        return the_options
+        return schema.makeOptionString(a)
 
     def extractTypename(self, a):
         """
         given an argparse action, find out what datatype it expects
         and return that as a string (used to create help text)
         """
-        rawtypename = "{0}".format(a.type)
-        if 'type' in rawtypename:
-          return rawtypename[7:-2]
-        elif 'class' in rawtypename:
-          return rawtypename[8:-2]
-        return rawtypename
+        return schema.extractTypename(a)
 
     def makeTypeHelp(self, a):
         """
         synthesize a human-readable string to describe the expected datatype
         """
-        typehelp = "programming error"
-        if a.choices:
-            typehelp = ""  # no need to explain as options are represented in a combo box
-        else:
-            rawtypename = self.extractTypename(a)
-            nargs = a.nargs
-
-            if rawtypename in ['int', 'float'] and a.default is not None:
-                typename = ""
-            elif rawtypename == 'None':
-                typename = ""
-            else:
-                try:
-                  intargs = int(nargs)
-                except ValueError:
-                  intargs = -1
-                except TypeError:
-                  intargs = -1
-
-                if nargs == '1':
-                  typename = SINGLE.get(rawtypename, rawtypename)
-                elif intargs > 0:
-                  if rawtypename in MULTIPLE:
-                    typename = MULTIPLE[rawtypename] % intargs
-                  else:
-                    typename = rawtypename
-                elif nargs == "*":
-                  if rawtypename in _OR_MORE:
-                    typename = "0" + _OR_MORE[rawtypename]
-                  else:
-                    typename = rawtypename
-                elif nargs == "+":
-                  if rawtypename in _OR_MORE:
-                    typename = "1" + _OR_MORE[rawtypename]
-                  else:
-                    typename = rawtypename
-                elif nargs == "?":
-                  typename = SINGLE.get(rawtypename, rawtypename)
-                else:
-                  typename = SINGLE.get(rawtypename, rawtypename)
-
-            typehelp = " [" + typename + "]" if typename else ""
-
-        return typehelp
+        return schema.makeTypeHelp(a)
 
     def getValidator(self, a):
         """
         return a validator for a QLineEdit
         """
-        validator = None
-        if not a.choices and a.nargs in [None, '1']:
-            rawtypename = self.extractTypename(a)
-            if rawtypename == 'int':
-                validator = QtGui.QIntValidator
-            elif rawtypename == 'float':
-                validator = QtGui.QDoubleValidator
-        return validator
+        return VALIDATORS.get(schema.validatorKind(a))
+
+    def getStateValidator(self, state):
+        """
+        return a validator for the QLineEdit of an option, as compiled in its schema
+        """
+        return VALIDATORS.get(state.schema.validator)
 
     def disableOnClick(self, widget):
         """
@@ -329,47 +501,72 @@ class ArgparseUi(QtGui.QDialog):
         """
         pass
 
-    def registerDisplayStateInfo(self, dest, list_of_widgets):
+    def registerDisplayStateInfo(self, state, include_widget, value_widget=None):
+        """
+        registers backward dependency from option state to its widgets;
+        used to update ui state when the model changes (e.g. when loading files)
+        """
+        self.stateToWidgets[state] = (include_widget, value_widget)
+
+    def makeIncludeWidget(self, state, label, value_widget, optional):
+        """
+        make the checkbox (or label, for options that cannot be left out) in front of an option
+        """
+        if optional:
+            include = QtGui.QCheckBox(label, self.options)
+            include.setChecked(state.enabled)
+            include.clicked.connect(self.includeClicked(state))
+            if self.use_sweep_button:
+                include.stateChanged.connect(self.includeStateChanged(state))
+            if value_widget is not None:
+                self.disableOnClick(value_widget)(state.enabled)
+                include.clicked.connect(self.disableOnClick(value_widget))
+        else:
+            include = QtGui.QLabel(label, self.options)
+            self.model.setEnabled(state, True, self)
+        self.registerDisplayStateInfo(state, include, value_widget)
+        return include
+
+    def includeClicked(self, state):
         """
-        registers backward dependency from option_string to widget;
-        used to update ui state when loading files
+        function that creates a function that copies the checked
+        state of a checkbox into the model
         """
-        for w in list_of_widgets:
-          if dest not in self.destToWidget:
-            self.destToWidget[dest] = []
-          self.destToWidget[dest].append(w)
+        def clicked(checked):
+            self.model.setEnabled(state, checked, self)
+        return clicked
+
+    def includeStateChanged(self, state):
+        """
+        function that creates a function that keeps track of the options
+        whose checkbox is partially checked (i.e. swept) in sweep mode
+        """
+        def changed(checkState):
+            if checkState == QtCore.Qt.PartiallyChecked:
+                self.sweptStates.add(state)
+            else:
+                self.sweptStates.discard(state)
+        return changed
+
+    def valueChanged(self, state, read_value):
+        """
+        function that creates a function that copies the value
+        of a widget into the model; read_value reads the value from the widget
+        """
+        def changed(*args):
+            self.model.setValue(state, read_value(), self)
+        return changed
 
     def makeStoreConstEntry(self, a, optional=True):
         """
         make a dialog entry for a StoreTrue action
         (represented as a label)
         """
-        helpstring = self.makeHelpString(a)
+        state = self.model.stateFor(a)
+        helpstring = state.schema.help
         rhslabel = QtGui.QLabel("", self.options)
-        include = QtGui.QCheckBox(helpstring, self.options)
-        if a.default:
-            include.setChecked(True)
+        include = self.makeIncludeWidget(state, helpstring, None, optional)
         self.optionsLayout.addRow(include, rhslabel)
-        self.registerDisplayStateInfo(a.dest, [include])
-        self.commandLineArgumentCreators.append(self.createFunctionToMakeStoreConstEntryCommandLine(include, a))
-        self.registerDisplayStateInfo(a.dest, [include])
-
-    def createFunctionToMakeStoreConstEntryCommandLine(self, include_widget, a):
-        """
-        function to create a function that generates a command line string,
-        specialized for one given option (these functions are generated on-the-fly
-        while building the ui)
-        """
-        def to_command_line():
-            if type(include_widget) == QtGui.QCheckBox:
-                checked = include_widget.isChecked()
-            else:
-                checked = True
-            if checked:
-                return ["{0}".format(a.option_strings[0])]
-            else:
-                return []
-        return to_command_line
 
     def makeStoreActionEntry(self, a, optional=True):
         """
@@ -377,255 +574,354 @@ class ArgparseUi(QtGui.QDialog):
         (represented as combo box or line edit, depending on
         choices being defined or not
         """
-        helpstring = self.makeHelpString(a)
-        typehelp = self.makeTypeHelp(a)
-        validator = self.getValidator(a)
+        state = self.model.stateFor(a)
+        helpstring = state.schema.help
+        typehelp = state.schema.typehelp
+        validator = self.getStateValidator(state)
         if a.choices:
-            combobox = QtGui.QComboBox(self.options)
-            for c in a.choices:
-                combobox.addItem("{0}".format(c))
-            if a.default is not None:
-                combobox.setCurrentIndex(combobox.findText("{0}".format(a.default)))
-
-            if optional:
-                include = QtGui.QCheckBox(comb(helpstring, typehelp), self.options)
-                enabled = a.default is not None
-                include.setChecked(enabled)
-                self.disableOnClick(combobox)(enabled)
-                include.clicked.connect(self.disableOnClick(combobox))
-                self.registerDisplayStateInfo(a.dest, [include])
-            else:
-                include = QtGui.QLabel(comb(helpstring, typehelp), self.options)
-
-            self.registerDisplayStateInfo(a.dest, [combobox])
-            self.commandLineArgumentCreators.append(self.createFunctionToMakeStoreEntryCommandLine(include, combobox, a))
+            combobox = ChoicesEditor(a.choices, self.options)
+            combobox.selectText(state.value, a.default)
+            combobox.currentIndexChanged.connect(self.valueChanged(state, combobox.currentChoice))
+            include = self.makeIncludeWidget(state, comb(helpstring, typehelp), combobox, optional)
             self.optionsLayout.addRow(include, combobox)
 
+        elif state.schema.path is not None:
+            editor = PathEditor(self.getPathScanner(), self.pathEditorMode(state), self.options)
+            editor.setText(state.value)
+            editor.textChanged.connect(self.valueChanged(state, editor.text))
+            include = self.makeIncludeWidget(state, comb(helpstring, typehelp), editor, optional)
+            self.optionsLayout.addRow(include, editor)
+
         else:
             lineedit = QtGui.QLineEdit(self.options)
-            if a.default is not None:
-                lineedit.setText("{0}".format(a.default))
+            lineedit.setText(state.value)
             if validator is not None:
                 lineedit.setValidator(validator(self))
-
-            if optional:
-                include = QtGui.QCheckBox(comb(helpstring, typehelp), self.options)
-                enabled = a.default is not None
-                include.setChecked(enabled)
-                self.disableOnClick(lineedit)(enabled)
-                include.clicked.connect(self.disableOnClick(lineedit))
-                self.registerDisplayStateInfo(a.dest, [include])
-            else:
-                include = QtGui.QLabel(comb(helpstring, typehelp), self.options)
-
-            self.registerDisplayStateInfo(a.dest, [lineedit])
-            self.commandLineArgumentCreators.append(self.createFunctionToMakeStoreEntryCommandLine(include, lineedit, a))
+            lineedit.textChanged.connect(self.valueChanged(state, lambda: "{0}".format(lineedit.text())))
+            include = self.makeIncludeWidget(state, comb(helpstring, typehelp), lineedit, optional)
             self.optionsLayout.addRow(include, lineedit)
 
-    def createFunctionToMakeStoreEntryCommandLine(self, include_widget, value_widget, argument):
-        """
-        function to create a function that generates a command line string,
-        specialized for one given option (these functions are generated on-the-fly
-        while building the ui)
-        """
-        def to_command_line():
-            if type(include_widget) == QtGui.QCheckBox:
-                checked = include_widget.isChecked()
-            else:
-                checked = True
-            if checked:
-                if type(value_widget) == QtGui.QLineEdit:
-                    if argument.option_strings:
-                        if argument.nargs == "1" or argument.nargs is None:
-                          return ["{0}".format(argument.option_strings[0]),
-                                  "{0}".format(value_widget.text())]
-                        else:
-                          cmd = ["{0}".format(argument.option_strings[0])]
-                          cmd.extend(["{0}".format(l) for l in "{0}".format(value_widget.text()).strip().split(" ")])
-                          return cmd
-                    else:
-                        return ["{0}".format(value_widget.text())]
-                elif type(value_widget) == QtGui.QComboBox:
-                    if argument.option_strings:
-                        return ["{0}".format(argument.option_strings[0]),
-                                "{0}".format(value_widget.currentText())]
-                    else:
-                        return ["{0}".format(value_widget.currentText())]
-                else:
-                    assert False  # programming error
-            else:
-                return []
-        return to_command_line
-
     def makeCountActionEntry(self, a, optional=True):
         """
         add an entry for a counting action
         (represented by a spinbox)
         """
-        helpstring = self.makeHelpString(a)
+        state = self.model.stateFor(a)
+        helpstring = state.schema.help
         spinbox = QtGui.QSpinBox(self.options)
         spinbox.setRange(0, 100)
-        spinbox.setValue(a.nargs)
-        if optional:
-            include = QtGui.QCheckBox(helpstring, self.options)
-            enabled = a.default is not None
-            include.setChecked(enabled)
-            self.disableOnClick(spinbox)(enabled)
-            include.clicked.connect(self.disableOnClick(spinbox))
-            self.registerDisplayStateInfo(a.dest, [include])
-        else:
-            include = QtGui.QLabel(helpstring, self.options)
-
-        self.registerDisplayStateInfo(a.dest, [spinbox])
-        self.commandLineArgumentCreators.append(self.createFunctionToMakeCountActionCommandLine(include, spinbox, a))
+        spinbox.setValue(state.value)
+        spinbox.valueChanged.connect(self.valueChanged(state, spinbox.value))
+        include = self.makeIncludeWidget(state, helpstring, spinbox, optional)
         self.optionsLayout.addRow(include, spinbox)
 
-    def createFunctionToMakeCountActionCommandLine(self, include_widget, value_widget, argument):
-        """
-        function to create a function that generates a command line string,
-        specialized for one given option (these functions are generated on-the-fly
-        while building the ui)
-        """
-
-        def to_command_line():
-            if type(include_widget) == QtGui.QCheckBox:
-                checked = include_widget.isChecked()
-            else:
-                checked = True
-            if checked:
-                if type(value_widget) == QtGui.QSpinBox:
-                    if argument.option_strings:
-                        return [("{0}".format(argument.option_strings[0]))] * value_widget.value()
-                    else:
-                        assert False  # programming error
-                else:
-                    assert False  # programming error
-            else:
-                return []
-        return to_command_line
-
-    def cleanupEmptyTableRows(self, tablewidget):
-        """
-        function to create a function that cleans up the unused columns of a tablewidget,
-        specialized for one given option (these functions are generated on-the-fly
-        while building the ui)
-        """
-        def cleanup(row, col):
-            data = []
-            tablewidget.blockSignals(True)
-            for c in range(tablewidget.columnCount()):
-                cellText = "{0}".format(tablewidget.item(0, c).text() if tablewidget.item(0, c) else "")
-                if cellText:
-                    data.append(cellText)
-            tablewidget.setColumnCount(len(data) + 1)
-            for c, d in enumerate(data):
-                tablewidget.setItem(0, c, QtGui.QTableWidgetItem(d))
-            tablewidget.setItem(0, len(data), QtGui.QTableWidgetItem(""))
-            tablewidget.blockSignals(False)
-        return cleanup
-
     def makeAppendActionEntry(self, a, optional=True):
         """
-        creates a table widget for appending arguments into a list
+        creates a list editor for appending arguments into a list
         """
-        helpstring = self.makeHelpString(a)
-        tablewidget = QtGui.QTableWidget(1, 1, self.options)
+        state = self.model.stateFor(a)
+        helpstring = state.schema.help
+        listeditor = ListEditor(state.value, self.options)
         sizePolicy = QtGui.QSizePolicy(QtGui.QSizePolicy.Expanding, QtGui.QSizePolicy.Expanding)
         sizePolicy.setHorizontalStretch(1)
         sizePolicy.setVerticalStretch(1)
-        sizePolicy.setHeightForWidth(tablewidget.sizePolicy().hasHeightForWidth())
-        tablewidget.setSizePolicy(sizePolicy)
-        tablewidget.cellChanged.connect(self.cleanupEmptyTableRows(tablewidget))
-        tablewidget.verticalHeader().hide()
-        tablewidget.horizontalHeader().hide()
-
-        if a.default:
-            # add enough rows to hold default data + one empty row
-            cnt = tablewidget.columnCount()
-            needed = len(a.default)
-            if needed >= cnt:
-                for i in range(needed - cnt + 1):
-                    tablewidget.insertColumn(tablewidget.columnCount())
-            for column, d in enumerate(a.default):
-                tablewidget.setItem(0, column, QtGui.QTableWidgetItem(d))
+        listeditor.setSizePolicy(sizePolicy)
+        listeditor.valuesChanged.connect(self.valueChanged(state, listeditor.values))
 
-        if optional:
-            include = QtGui.QCheckBox(helpstring, self.options)
-            enabled = a.default is not None
-            include.setChecked(enabled)
-            self.disableOnClick(tablewidget)(enabled)
-            include.clicked.connect(self.disableOnClick(tablewidget))
-            self.registerDisplayStateInfo(a.dest, [include])
+        include = self.makeIncludeWidget(state, helpstring, listeditor, optional)
+        self.optionsLayout.addRow(include, listeditor)
+
+    def makeSubParsersEntry(self, a, optional=True):
+        """
+        add a subcommand selector, followed by the options of the selected subcommand
+        """
+        state = self.model.stateFor(a)
+        selector = ChoicesEditor(a.choices, self.options)
+        selector.selectText(state.value, a.default)
+        selector.currentIndexChanged.connect(self.valueChanged(state, selector.currentChoice))
+        include = self.makeIncludeWidget(state, state.schema.help, selector, optional)
+        self.optionsLayout.addRow(include, selector)
+        self.optionsLayout.addRow(self.makeSubcommandPages(state))
+
+    def makeSubcommandPages(self, state):
+        """
+        stacked widget that will hold one page per subcommand of a subparsers option
+        """
+        pages = QtGui.QStackedWidget(self.options)
+        self.subcommandPages[state] = (pages, {})
+        self.showSubcommandPage(state)
+        return pages
+
+    def showSubcommandPage(self, state):
+        """
+        show the page of the selected subcommand; pages are built
+        the first time their subcommand is selected and kept afterwards
+        """
+        pages, built = self.subcommandPages[state]
+        pages.setVisible(state.enabled)
+        if not state.enabled or state.value not in state.action.choices:
+            return
+        if state.value not in built:
+            page = ArgparseUi(state.action.choices[state.value],
+                              instrumentation=self.instrumentation,
+                              remove_defaults_from_helptext=self.remove_defaults_from_helptext,
+                              helptext_default=self.helptext_default,
+                              left_label_alignment=self.left_label_alignment,
+                              use_item_view=self.use_item_view,
+                              options_model=self.model.childModel(state, state.value),
+                              embedded=True, parent=pages)
+            pages.addWidget(page)
+            built[state.value] = page
+        pages.setCurrentWidget(built[state.value])
+
+    def onStateChanged(self, state, origin):
+        """
+        model listener: bring the widgets of an option in sync with its state,
+        unless the change originated from those widgets; in a batch, this waits until
+        the batch ends, and happens once per option
+        """
+        if self.batchDepth:
+            if state not in self.batchedStates or origin is not self:
+                self.batchedStates[state] = origin
+            return
+        if origin is not self and state in self.stateToWidgets:
+            self.copyStateToUi(state)
+        if self.preview is not None:
+            self.previewDirty.add(state)
+            self.previewTimer.start()
+        if state in self.subcommandPages:
+            self.showSubcommandPage(state)
+        if ((self.use_item_view or state in self.stateToWidgets) and
+                (self.model.needsChecking(state) or state.schema.path == 'file')):
+            self.pendingValidation.add(state)
+            self.validationTimer.start()
+        if state in self.model.stateToMutexGroups:
+            for g in self.model.stateToMutexGroups[state]:
+                for member in self.model.mutexMembers[g]:
+                    self.markMutexViolation(member)
+
+    def getExecutor(self):
+        """
+        worker thread for parsing and other background work, started on first use
+        """
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        return self.executor
+
+    def getSweepExecutor(self):
+        """
+        worker thread for writing sweeps, started on first use; a sweep can take long to
+        write, so it does not share the thread that parses the options
+        """
+        if self.sweepExecutor is None:
+            self.sweepExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        return self.sweepExecutor
+
+    def getPathScanner(self):
+        """
+        lists directories for path completion and checks FileType values in a worker
+        thread of its own (so a slow file system does not hold up parsing)
+        """
+        if self.pathScanner is None:
+            self.pathScanner = PathScanner(DIRECTORY_CACHE)
+        return self.pathScanner
+
+    def pathEditorMode(self, state):
+        """
+        the file dialog offered by the browse button of a path option
+        """
+        if state.schema.path == 'directory':
+            return 'directory'
+        if state.schema.path == 'file' and 'r' not in state.action.type._mode:
+            return 'save'
+        return 'open'
+
+    def getOptionIndex(self):
+        """
+        search index over the options; it only depends on the parser, so it is built
+        in the worker thread as soon as the dialog has a filter box (the first
+        keystroke waits for it if it comes before the index is ready)
+        """
+        if self.optionIndex is None:
+            self.optionIndex = self.getExecutor().submit(OptionIndex, self.model.states)
+        return self.optionIndex.result()
+
+    def getRowWidgets(self):
+        """
+        maps the include widget of every form row to all widgets of that row (built on first use)
+        """
+        if self.rowWidgets is None:
+            self.rowWidgets = {}
+            for layout in self.formLayouts:
+                for row in range(layout.rowCount()):
+                    items = [layout.itemAt(row, role)
+                             for role in [QtGui.QFormLayout.LabelRole, QtGui.QFormLayout.FieldRole]]
+                    widgets = [i.widget() for i in items if i is not None and i.widget() is not None]
+                    if len(widgets) == 2:
+                        self.rowWidgets[widgets[0]] = widgets
+        return self.rowWidgets
+
+    def filterOptions(self, text):
+        """
+        hide the options that do not match the filter text; no widgets are created,
+        and only the rows whose visibility changes are touched
+        """
+        rows = self.getOptionIndex().match("{0}".format(text))
+        states = self.model.states
+        hidden = set() if rows is None else set(states[i] for i in range(len(states)) if i not in rows)
+        if self.use_item_view:
+            self.optionsModel.setFilter(None if rows is None else set(states[i] for i in rows))
+        else:
+            rowWidgets = self.getRowWidgets()
+            self.options.setUpdatesEnabled(False)
+            for state in hidden ^ self.hiddenStates:
+                if state in self.stateToWidgets:
+                    for w in rowWidgets.get(self.stateToWidgets[state][0], []):
+                        w.setVisible(state not in hidden)
+            for section in self.sections:
+                section.setVisible(not all(s in hidden for s in section.states))
+            self.options.setUpdatesEnabled(True)
+        self.hiddenStates = hidden
+
+    def makePreview(self):
+        """
+        read-only pane showing the shell-quoted command line, with a button to copy it
+        """
+        box = QtGui.QWidget(self)
+        layout = QtGui.QHBoxLayout(box)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.preview = QtGui.QPlainTextEdit(box)
+        self.preview.setReadOnly(True)
+        self.preview.setMaximumHeight(4 * self.preview.fontMetrics().lineSpacing())
+        layout.addWidget(self.preview)
+        copy = QtGui.QPushButton("Copy", box)
+        copy.clicked.connect(lambda: QtGui.QApplication.clipboard().setText(self.preview.toPlainText()))
+        layout.addWidget(copy)
+        self.previewParts = None
+        self.previewDirty = set()
+        self.previewTimer = QtCore.QTimer(self)
+        self.previewTimer.setSingleShot(True)
+        self.previewTimer.setInterval(100)
+        self.previewTimer.timeout.connect(self.updatePreview)
+        self.updatePreview()
+        return box
+
+    def quotedSegment(self, state):
+        return " ".join(quote(a) for a in self.model.segment(state))
+
+    def updatePreview(self):
+        """
+        re-render the preview; only the segments of options that changed since the
+        last update are quoted again (runs debounced after changes)
+        """
+        states = self.model.states
+        if self.previewParts is None:
+            self.previewIndex = dict((s, i) for i, s in enumerate(states))
+            self.previewParts = [self.quotedSegment(s) for s in states]
         else:
-            include = QtGui.QLabel(helpstring, self.options)
+            for state in self.previewDirty:
+                self.previewParts[self.previewIndex[state]] = self.quotedSegment(state)
+        self.previewDirty = set()
+        parts = [quote(self.parser.prog)] + [p for p in self.previewParts if p]
+        self.preview.setPlainText(" ".join(parts))
 
-        self.registerDisplayStateInfo(a.dest, [tablewidget])
-        self.commandLineArgumentCreators.append(self.createFunctionToMakeAppendCommandLine(include, tablewidget, a))
-        self.optionsLayout.addRow(include, tablewidget)
+    def markMutexViolation(self, state):
+        """
+        highlight the label of an option that conflicts with another option of its mutex group
+        """
+        if state in self.stateToWidgets:
+            self.markInvalid(self.stateToWidgets[state][0], self.model.isMutexViolation(state))
 
-    def createFunctionToMakeAppendCommandLine(self, include_widget, tablewidget, argument):
+    def markInvalid(self, widget, invalid, message=None):
         """
-        function to create a function that generates a command line string,
-        specialized for one given option (these functions are generated on-the-fly
-        while building the ui)
+        show a widget in red if invalid is True, with the reason as tooltip
         """
-        def to_command_line():
-            data = []
-            if type(include_widget) == QtGui.QCheckBox:
-                checked = include_widget.isChecked()
-            else:
-                checked = True
-            if checked:
-                if type(tablewidget) == QtGui.QTableWidget:
-                    if argument.option_strings:
-                        for c in range(tablewidget.columnCount()):
-                          cellText = "{0}".format(tablewidget.item(0, c).text() if tablewidget.item(0, c) else "")
-                          if cellText:
-                              data.extend([argument.option_strings[0], cellText])
-                    else:
-                        assert False  # programming error
-                else:
-                    assert False  # programming error
+        style = "color: red" if invalid else ""
+        if widget.styleSheet() != style:
+            widget.setStyleSheet(style)
+        if message is not None or not invalid:
+            widget.setToolTip(message if invalid else "")
+
+    def validatePendingValues(self):
+        """
+        check the values that changed since the last check with their type= converters
+        (runs debounced while typing); converters can be slow, so they run in the worker
+        thread (results are memoized by the model) and the outcome is shown when it arrives
+        """
+        pending, self.pendingValidation = self.pendingValidation, set()
+        for state in pending:
+            if not state.enabled or not state.value or (self.sweepMode and expandValue(state.value) is not None):
+                self.showValueError(state, None)
+                continue
+            value = list(state.value) if state.kind == 'append' else state.value
+            if state.schema.path == 'file':
+                # argparse.FileType would open the file: check it with stat and access calls instead
+                future = self.getPathScanner().check(state.action.type, value)
             else:
-                return []
-            return data
-        return to_command_line
+                future = self.getExecutor().submit(self.model.checkValue, state, value)
+            future.state = state
+            future.value = value
+            future.add_done_callback(self.valueChecked.emit)
 
-    def makeCommandLine(self):
+    def onValueChecked(self, future):
         """
-        construct the command line from the ui state
+        show the result of checking a value, unless the value changed meanwhile
+        (then a newer check is under way)
+        """
+        state = future.state
+        if not state.enabled or state.value != future.value or future.exception() is not None:
+            return
+        self.showValueError(state, future.result())
+
+    def showValueError(self, state, error):
+        if state in self.stateToWidgets:
+            self.markInvalid(self.stateToWidgets[state][1], error is not None, error)
+        elif self.use_item_view:
+            self.optionsModel.setError(state, error)
+
+    def copyStateToUi(self, state):
+        """
+        update the widgets of one option from its state; widgets that already
+        show the state are left alone, and no widget signals are emitted
         """
-        commandline = []
-        for c in self.commandLineArgumentCreators:
-            commandline.extend(c())
-        return commandline
+        include, w = self.stateToWidgets[state]
+        if type(include) == QtGui.QCheckBox and include.isChecked() != state.enabled:
+            include.blockSignals(True)
+            include.setChecked(state.enabled)
+            include.blockSignals(False)
+        if w is None:
+            return
+        if w.isEnabled() != state.enabled:
+            w.setEnabled(state.enabled)
+        w.blockSignals(True)
+        if type(w) == QtGui.QLineEdit:
+            if "{0}".format(w.text()) != state.value:
+                w.setText(state.value)
+        elif type(w) == QtGui.QSpinBox:
+            if w.value() != state.value:
+                w.setValue(state.value)
+        elif type(w) == PathEditor:
+            if w.text() != state.value:
+                w.setText(state.value)
+        elif type(w) == ChoicesEditor:
+            if w.currentChoice() != "{0}".format(state.value):
+                w.selectText(state.value, state.action.default)
+        elif type(w) == ListEditor:
+            if w.values() != state.value:
+                w.setValues(state.value)
+        w.blockSignals(False)
 
-    def hasOne(self, list_of_possibilities, cmdline):
+    def makeCommandLine(self):
         """
-        True if an element of list_of_possibilities occurs in cmdline
+        construct the command line from the ui state
         """
-        for p in list_of_possibilities:
-            if p in cmdline:
-                return True
-        return False
+        return self.model.makeCommandLine()
 
     def validateMutualExclusiveOptions(self):
         """
         check if mutex options specified
         """
-        cmdline = " ".join(self.makeCommandLine())
-        for m in self.parser._mutually_exclusive_groups:
-            foundOne = False
-            offending_options = []
-            for a in m._group_actions:
-                present = self.hasOne(a.option_strings, cmdline)
-                if present and foundOne:
-                    offending_options.append(a.option_strings)
-                    return False, offending_options
-                elif present:
-                    offending_options.append(a.option_strings)
-                    foundOne = True
-        return True, []
+        return self.model.validateMutualExclusiveOptions()
 
     def onOk(self):
         """
@@ -633,54 +929,309 @@ class ArgparseUi(QtGui.QDialog):
         """
         validate, offensive_options = self.validateMutualExclusiveOptions()
         if validate:
-            if self.ok_button_handler is None:
-                self.accept()
-            else:
-                self.ok_button_handler(self)
+            self.setBusy(True)
+            self.pendingOk = self.parse_args_async()
         else:
             mutexes = "\n".join([",".join(o) for o in offensive_options])
             QtGui.QMessageBox.question(self, 'Validation error', "The following options are mutually exclusive:\n{0}".format(mutexes), QtGui.QMessageBox.Ok, QtGui.QMessageBox.Ok)
 
+    def setBusy(self, busy):
+        """
+        show that the options are being checked (without blocking the event loop)
+        """
+        self.OkButton.setEnabled(not busy)
+        if busy:
+            QtGui.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        else:
+            QtGui.QApplication.restoreOverrideCursor()
+
+    def dropPendingOk(self):
+        """
+        forget the parse started by the ok button, so its result neither accepts the
+        dialog nor calls the ok button handler
+        """
+        if self.pendingOk is not None:
+            self.pendingOk = None
+            self.setBusy(False)
+
+    def onParseDone(self, future):
+        """
+        handle the result of parse_args_async on the GUI thread
+        """
+        error = future.exception()
+        if error is None:
+            self.parsedArgs = future.cmdline, future.result()
+            self.argsParsed.emit(future.result())
+        else:
+            self.parseFailed.emit("{0}".format(error))
+        if future is not self.pendingOk:
+            return
+        self.pendingOk = None
+        self.setBusy(False)
+        if error is not None:
+            QtGui.QMessageBox.critical(self, 'Validation error', "Invalid options:\n{0}".format(error))
+        elif self.ok_button_handler is None:
+            self.accept()
+        else:
+            self.ok_button_handler(self)
+
+    def setSweepMode(self, on):
+        """
+        in sweep mode, checkboxes get a third (partially checked) state that sweeps the option
+        (on and off for flags, every choice for options with choices), and fields accept
+        sweep expressions such as {a,b,c} or {1..10..2} (see sweep.py)
+        """
+        self.sweepMode = on
+        if self.use_sweep_button:
+            self.SaveSweepButton.setEnabled(on)
+        for state, (include, w) in self.stateToWidgets.items():
+            if type(include) == QtGui.QCheckBox:
+                if not on and include.checkState() == QtCore.Qt.PartiallyChecked:
+                    include.setCheckState(QtCore.Qt.Checked)
+                include.setTristate(on)
+            if type(w) == QtGui.QLineEdit:
+                if on and w.validator() is not None:
+                    self.sweepValidators[w] = w.validator()
+                    w.setValidator(None)
+                elif not on and w in self.sweepValidators:
+                    w.setValidator(self.sweepValidators.pop(w))
+        if not on:
+            self.sweptStates.clear()
+
+    def sweep(self):
+        """
+        the sweep spanned by the current options (see sweep.Sweep); its commandLines()
+        and namespaces() generators stream the combinations lazily
+        """
+        return Sweep(self.model, self.sweptStates if self.sweepMode else ())
+
+    def onSaveSweep(self):
+        """
+        write all command lines of the sweep to a file, one per line, in a worker thread
+        """
+        filename = self.fileDialogResult(QtGui.QFileDialog.getSaveFileName(self, "Save sweep as"))
+        if not filename:
+            return
+        try:
+            sweep = self.sweep()
+        except ValueError as e:
+            QtGui.QMessageBox.critical(self, "Critical", "Invalid sweep:\n{0}".format(e))
+            return
+        progress = self.sweepProgress = QtGui.QProgressDialog(
+            "Writing up to {0} command lines to {1}".format(sweep.size(), filename), "Cancel", 0, 0, self)
+        progress.setWindowModality(QtCore.Qt.WindowModal)
+        progress.setMinimumDuration(500)
+        cancelled = []
+        progress.canceled.connect(lambda: cancelled.append(True))
+        future = self.getSweepExecutor().submit(sweep.write, filename, lambda: bool(cancelled))
+        future.filename = filename
+        future.add_done_callback(self.sweepDone.emit)
+
+    def onSweepDone(self, future):
+        """
+        report the result of onSaveSweep on the GUI thread
+        """
+        if self.sweepProgress is not None:
+            self.sweepProgress.close()
+            self.sweepProgress = None
+        error = future.exception()
+        if error is not None:
+            QtGui.QMessageBox.critical(self, "Critical", "Couldn't write sweep to {0}:\n{1}".format(future.filename, error))
+        else:
+            QtGui.QMessageBox.information(self, "Sweep saved",
+                                          "Wrote {0} command lines to {1}".format(future.result(), future.filename))
+
+    def onRun(self):
+        """
+        queue a run of the current command line with the launcher (in sweep mode, one run
+        per command line of the sweep, taken lazily) and show the runs and their output
+        """
+        if self.launchPanel is None:
+            self.launchPanel = LaunchPanel(self.launcher, self)
+            self.mainLayout.insertWidget(self.presetsPosition, self.launchPanel)
+        if not self.sweepMode:
+            self.launcher.submit(self.makeCommandLine())
+            return
+        try:
+            sweep = self.sweep()
+        except ValueError as e:
+            QtGui.QMessageBox.critical(self, "Critical", "Invalid sweep:\n{0}".format(e))
+            return
+        self.launcher.submitMany(sweep.commandLines())
+
+    def startAutosave(self):
+        """
+        offer to restore the options of an earlier session of this parser that did not
+        end normally, then start journaling the changes
+        """
+        if self.autosave is None:
+            return
+        changes = self.autosave.recover()
+        if changes:
+            answer = QtGui.QMessageBox.question(
+                self, "Restore options",
+                "{0} options of an earlier session were not saved. Restore them?".format(len(changes)),
+                QtGui.QMessageBox.Yes | QtGui.QMessageBox.No)
+            if answer == QtGui.QMessageBox.Yes:
+                self.model.applyChanges(changes)
+            else:
+                self.autosave.discard()
+        self.autosave.start()
+
+    def done(self, result):
+        """
+        the session ended normally, so its autosave journal is no longer needed
+        """
+        self.dropPendingOk()
+        if self.autosave is not None:
+            self.autosave.close(discard=True)
+            self.autosave = None
+        if self.pathScanner is not None:
+            # (its worker thread is started again if a reused dialog needs it)
+            self.pathScanner.shutdown()
+        super(ArgparseUi, self).done(result)
+
     def onCancel(self):
         """
         handle cancel button pressed
         """
+        self.dropPendingOk()
         if self.cancel_button_handler is None:
             self.reject()
         else:
             self.cancel_button_handler(self)
 
-    def resetAllWidgets(self, argparser):
-        helper = argparse.ArgumentParser(add_help=False, parents=[self.parser], fromfile_prefix_chars='@')
-        # make sure default values don't get enabled
-        for a in helper._get_optional_actions():
-          a.default = None
-        for a in helper._get_positional_actions():
-          a.default = None
-        # make sure all checkboxes that were already enabled are disabled first
-        for a in self.destToWidget:
-          for w in self.destToWidget[a]:
-            if type(w) == QtGui.QCheckBox:
-              w.setChecked(False)
-              w.clicked.emit(False)
-            elif type(w) == QtGui.QTableWidget:
-              w.setColumnCount(1)
-              w.setItem(0, 0, QtGui.QTableWidgetItem(""))
+    def resetToDefaults(self, namespace=None):
+        """
+        prepare the dialog for another use instead of building a new one: pending loads
+        and parses are dropped, and the options are reset to the parser defaults, or to
+        the options of namespace (e.g. the result of an earlier parse_args). Only the
+        widgets of options that change are updated. Returns the dialog
+        """
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader = None
+        if self.applier is not None:
+            self.applier.cancel()
+            self.applier = None
+        self.dropPendingOk()
+        if namespace is None:
+            self.model.resetToDefaults()
+        else:
+            self.model.resetToNamespace(namespace)
+        self.setResult(0)
+        if self.autosaveSetting and self.autosave is None:
+            # done() ended the journal of the previous use
+            self.autosave = Autosave(self.model, self.autosaveDirectory)
+            self.autosave.start()
+        return self
+
+    def resetAllWidgets(self, argparser=None):
+        """
+        exclude all options (used before loading options from file)
+        """
+        self.model.reset()
+
+    def fileDialogResult(self, result):
+        """
+        Qt5 file dialogs return a (filename, filter) tuple, Qt4 ones just the filename
+        """
+        if isinstance(result, tuple):
+            result = result[0]
+        return "{0}".format(result) if result else None
 
     def onLoad(self):
         """
         handle load button pressed
         """
-        filename = QtGui.QFileDialog.getOpenFileName()
+        filename = self.fileDialogResult(QtGui.QFileDialog.getOpenFileName())
         if filename:
-          helper = argparse.ArgumentParser(add_help=False, parents=[self.parser], fromfile_prefix_chars='@')
-          self.resetAllWidgets(helper)
-          result = helper.parse_args(['@{0}'.format(filename)])
-          for a in helper._get_optional_actions():
-            self.copyActionValuesToUi(a, result)
-          for a in helper._get_positional_actions():
-            self.copyActionValuesToUi(a, result)
-          self.filename = filename
+          self.loadFile(filename)
+
+    def loadFile(self, filename):
+        """
+        load options from an argument file; the file is read and parsed in a worker thread
+        (with a progress dialog that can cancel it, shown if loading takes a while) and
+        the result is copied into the ui in batches
+        """
+        if self.loader is not None:
+            self.loader.cancel()
+        loader = self.loader = ArgumentFileLoader(self.model, filename, self)
+        t0 = time.perf_counter()
+        progress = QtGui.QProgressDialog("Loading {0}".format(filename), "Cancel", 0, 1000, self)
+        progress.setWindowModality(QtCore.Qt.WindowModal)
+        progress.setMinimumDuration(500)
+        progress.canceled.connect(self.loader.cancel)
+        self.loader.progress.connect(lambda fraction: progress.setValue(int(fraction * 1000)))
+        self.loader.finished.connect(progress.close)
+
+        def loaded(namespace):
+            if self.loader is not loader:
+                return
+            if self.instrumentation is not None:
+                elapsed(self.instrumentation, 'load_parse', t0)
+                t1 = time.perf_counter()
+            applier = self.applyInBatches(namespace)
+            if self.instrumentation is not None:
+                applier.finished.connect(lambda: elapsed(self.instrumentation, 'load_apply', t1))
+            self.filename = filename
+
+        def failed(message):
+            QtGui.QMessageBox.critical(self, "Critical", "Couldn't load options:\n{0}".format(message))
+
+        self.loader.loaded.connect(loaded)
+        self.loader.failed.connect(failed)
+        self.loader.start()
+
+    def applyInBatches(self, namespace):
+        """
+        copy a parsed namespace into the model a few hundred options at a time,
+        so the dialog stays responsive; only the options that change are touched,
+        and the options widget is repainted once per batch; returns the (started) BatchApplier.
+        An earlier applier that did not finish yet is cancelled
+        """
+        if self.applier is not None:
+            self.applier.cancel()
+        applier = self.applier = BatchApplier(self.model, namespace, suspended=self.options, parent=self)
+        applier.finished.connect(applier.deleteLater)
+        applier.finished.connect(lambda: self.appliedInBatches(applier))
+        applier.start()
+        return applier
+
+    def appliedInBatches(self, applier):
+        if self.applier is applier:
+            self.applier = None
+
+    def showPresets(self, show):
+        """
+        show or hide the preset panel; it is created when first shown
+        """
+        if self.presetPanel is None:
+            self.presetPanel = PresetPanel(self.presetLibrary, self.savePreset, self)
+            self.presetPanel.presetChosen.connect(self.loadPreset)
+            self.mainLayout.insertWidget(self.presetsPosition, self.presetPanel)
+        self.presetPanel.setVisible(show)
+
+    def savePreset(self, name, tags):
+        """
+        store the current options in the preset library
+        """
+        try:
+            self.presetLibrary.saveModel(name, self.model, tags)
+        except sqlite3.Error as e:
+            QtGui.QMessageBox.critical(self, "Critical", "Couldn't save preset {0}:\n{1}".format(name, e))
+
+    def loadPreset(self, name):
+        """
+        replace the current options by the ones stored in a preset
+        """
+        name = "{0}".format(name)
+        try:
+            namespace = self.model.parseArguments(self.presetLibrary.arguments(name), fromfile_prefix_chars=None)
+        except (KeyError, LoadError, sqlite3.Error) as e:
+            QtGui.QMessageBox.critical(self, "Critical", "Couldn't load preset {0}:\n{1}".format(name, e))
+            return
+        self.applyInBatches(namespace)
 
     def copyActionValuesToUi(self, a, result):
         """
@@ -688,41 +1239,7 @@ class ArgparseUi(QtGui.QDialog):
         a = argparse action
         result = argparse parse result
         """
-        if a.dest in self.destToWidget:
-          for w in self.destToWidget[a.dest]:
-            data = result.__getattribute__(a.dest)
-            if type(w) == QtGui.QCheckBox:
-              if data is not None:
-                if type(data) == bool:
-                    w.setChecked(data)
-                    w.clicked.emit(data)
-                else:
-                    w.setChecked(True)
-                    w.clicked.emit(True)
-            elif type(w) == QtGui.QLineEdit:
-              if data is not None:
-                if type(data) == type([]):
-                  w.setText(" ".join(["{0}".format(d) for d in data]))
-                else:
-                  w.setText("{0}".format(data))
-            elif type(w) == QtGui.QSpinBox:
-              if data is not None:
-                w.setValue(int("{0}".format(data)))
-            elif type(w) == QtGui.QComboBox:
-              if data is not None:
-                w.setCurrentIndex(w.findText("{0}".format(data)))
-            elif type(w) == QtGui.QTableWidget:
-                # clear existing defaults first
-                w.setColumnCount(1)
-                w.setItem(0, 0, QtGui.QTableWidgetItem(""))
-                cnt = w.columnCount()
-                if data is not None:
-                    needed = len(data)
-                    if needed >= cnt:
-                        for i in range(needed - cnt + 1):
-                            w.insertColumn(w.columnCount())
-                    for column, d in enumerate(data):
-                        w.setItem(0, int("{0}".format(column)), QtGui.QTableWidgetItem(d))
+        self.model.copyActionValues(a.dest, getattr(result, a.dest, None))
 
     def onSave(self):
         """
@@ -732,10 +1249,7 @@ class ArgparseUi(QtGui.QDialog):
           self.onSaveAs()
         else:
           try:
-            with open(self.filename, "w") as f:
-              c = self.makeCommandLine()
-              for line in c:
-                f.write(line + "\n")
+            self.model.save(self.filename)
           except IOError:
             import os.path
             QtGui.QMessageBox.critical(self,
@@ -746,18 +1260,148 @@ class ArgparseUi(QtGui.QDialog):
         """
         what to do when the save as button is clicked
         """
-        filename = QtGui.QFileDialog.getSaveFileName()
+        filename = self.fileDialogResult(QtGui.QFileDialog.getSaveFileName())
         if filename:
           self.filename = filename
           self.onSave()
 
+    def callInGuiThread(self, function, args=(), timeout=None):
+        """
+        call function(*args) on the GUI thread and return its result (or raise its exception);
+        from other threads the call is queued to the event loop and waited for, at most
+        timeout seconds (after which it is dropped and concurrent.futures.TimeoutError is raised)
+        """
+        if QtCore.QThread.currentThread() == self.thread():
+            return function(*args)
+        future = concurrent.futures.Future()
+        self.callRequested.emit((function, args, future))
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def onCallRequested(self, request):
+        function, args, future = request
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = function(*args)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        context in which changes to the options only update the model: the widgets, preview
+        and validation of every changed option are brought up to date once when the batch
+        ends, with layouts and repaints suspended, so a bulk update costs one layout pass.
+        Batches nest, and can be used from any thread (like get_values and set_values)
+        """
+        self.callInGuiThread(self.beginBatch)
+        try:
+            yield self
+        finally:
+            self.callInGuiThread(self.endBatch)
+
+    def beginBatch(self):
+        self.batchDepth += 1
+        if self.batchDepth == 1:
+            self.setUpdatesEnabled(False)
+            for layout in [self.mainLayout] + self.formLayouts:
+                layout.setEnabled(False)
+
+    def endBatch(self):
+        self.batchDepth -= 1
+        if self.batchDepth:
+            return
+        batched, self.batchedStates = self.batchedStates, collections.OrderedDict()
+        for state, origin in batched.items():
+            self.onStateChanged(state, origin)
+        for layout in [self.mainLayout] + self.formLayouts:
+            layout.setEnabled(True)
+        self.mainLayout.activate()
+        self.setUpdatesEnabled(True)
+
+    def get_values(self, timeout=None):
+        """
+        the options as {dest: value}, see OptionsModel.values; can be called from any thread
+        """
+        return self.callInGuiThread(self.model.values, (), timeout)
+
+    def set_values(self, values, timeout=None):
+        """
+        set options from a mapping {dest: value} (see OptionsModel.setValues) or from a
+        namespace such as a parse_args result (attributes of other parsers, e.g. those of
+        subcommands, are ignored), in one batch; can be called from any thread and returns
+        once the dialog shows the new values
+        """
+        if not hasattr(values, "items"):
+            values = self.model.namespaceValues(values)
+        return self.callInGuiThread(self.applyValues, (values,), timeout)
+
+    def applyValues(self, values):
+        with self.batch():
+            self.model.setValues(values)
+
     def parse_args(self):
         """
-        method to ensure that the ui looks and feels identical to the argparse parser
+        method to ensure that the ui looks and feels identical to the argparse parser;
+        when the options were already parsed (e.g. when Ok was pressed) and did not
+        change since, the result of that parse is returned
         """
         cmdline = self.makeCommandLine()
+        if self.parsedArgs is not None and self.parsedArgs[0] == cmdline:
+            return self.parsedArgs[1]
         return self.parser.parse_args(cmdline)
 
+    def parse_args_async(self):
+        """
+        like parse_args, but let the parser (and its type= converters) run in a worker
+        thread; returns a concurrent.futures.Future and also emits argsParsed(namespace)
+        or parseFailed(message) on the GUI thread. Invalid options raise (or report)
+        model.ParseError instead of exiting
+        """
+        cmdline = self.makeCommandLine()
+        future = self.getExecutor().submit(self.model.parseCommandLine, cmdline)
+        future.cmdline = cmdline
+        future.add_done_callback(self.parseDone.emit)
+        return future
+
+
+class DialogCache(object):
+    """
+    keeps the most recently used size dialogs alive, so tools that show the options
+    of the same parser again and again only build each dialog once; get() returns a
+    dialog reset to the parser defaults (or to namespace)
+    """
+    def __init__(self, size=4):
+        self.size = size
+        self.entries = []  # (parser, keyword arguments, dialog), most recently used last
+
+    def get(self, parser, namespace=None, **kwargs):
+        """
+        a dialog for parser built with the given ArgparseUi keyword arguments
+        """
+        for i, (p, k, dialog) in enumerate(self.entries):
+            if p is parser and k == kwargs:
+                self.entries.append(self.entries.pop(i))
+                return dialog.resetToDefaults(namespace)
+        dialog = ArgparseUi(parser, **kwargs)
+        if namespace is not None:
+            dialog.resetToDefaults(namespace)
+        self.entries.append((parser, kwargs, dialog))
+        while len(self.entries) > self.size:
+            self.entries.pop(0)[2].deleteLater()
+        return dialog
+
+    def clear(self):
+        for p, k, dialog in self.entries:
+            dialog.deleteLater()
+        self.entries = []
+
 
 if __name__ == "__main__":
     from sys import argv
@@ -0,0 +1,530 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+"""
+custom editor widgets used by the options dialog
+"""
+
+import re
+import bisect
+import itertools
+import io
+
+from .qt import QtCore, QtGui
+from .paths import completions, splitPath
+
+from collections.abc import Sequence
+
+
+class StringListModel(QtCore.QAbstractListModel):
+    """
+    editable list of strings that supports inserting many strings in one go
+    """
+    def __init__(self, parent=None):
+        super(StringListModel, self).__init__(parent)
+        self.strings = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.strings)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if index.isValid() and role in [QtCore.Qt.DisplayRole, QtCore.Qt.EditRole]:
+            return self.strings[index.row()]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEditable
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+        value = "{0}".format(value)
+        if value:
+            self.strings[index.row()] = value
+            self.dataChanged.emit(index, index)
+        else:
+            self.removeRows(index.row(), 1)
+        return True
+
+    def removeRows(self, row, count, parent=QtCore.QModelIndex()):
+        if count <= 0 or row < 0 or row + count > len(self.strings):
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        del self.strings[row:row + count]
+        self.endRemoveRows()
+        return True
+
+    def appendStrings(self, strings):
+        """
+        append all (non-empty) strings with a single insert notification
+        """
+        strings = [s for s in strings if s]
+        if not strings:
+            return
+        first = len(self.strings)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(strings) - 1)
+        self.strings.extend(strings)
+        self.endInsertRows()
+
+    def setStrings(self, strings):
+        self.beginResetModel()
+        self.strings = [s for s in strings if s]
+        self.endResetModel()
+
+
+def splitLines(text):
+    """
+    non-empty, stripped lines of a text
+    """
+    return [l.strip() for l in text.splitlines() if l.strip()]
+
+
+class ListEditor(QtGui.QWidget):
+    """
+    editor for a list of values (used for append actions): a list view,
+    a line edit to add one value, and buttons to paste many lines from the
+    clipboard, import them from a text file, remove selected values or clear all;
+    valuesChanged is emitted once per edit, also for batched edits
+    """
+    valuesChanged = QtCore.pyqtSignal()
+
+    def __init__(self, values=None, parent=None):
+        super(ListEditor, self).__init__(parent)
+        self.listModel = StringListModel(self)
+        if values:
+            self.listModel.setStrings(values)
+
+        layout = QtGui.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.view = QtGui.QListView(self)
+        self.view.setModel(self.listModel)
+        self.view.setUniformItemSizes(True)
+        self.view.setSelectionMode(QtGui.QAbstractItemView.ExtendedSelection)
+        layout.addWidget(self.view)
+
+        row = QtGui.QHBoxLayout()
+        self.newValue = QtGui.QLineEdit(self)
+        self.newValue.setPlaceholderText("add a value and press enter")
+        self.newValue.returnPressed.connect(self.onAdd)
+        row.addWidget(self.newValue)
+        for label, handler in [("Paste", self.onPaste), ("Import...", self.onImport),
+                               ("Remove", self.onRemove), ("Clear", self.onClear)]:
+            b = QtGui.QPushButton(label, self)
+            b.clicked.connect(handler)
+            row.addWidget(b)
+        layout.addLayout(row)
+
+        self.listModel.dataChanged.connect(self.emitChanged)
+        self.listModel.rowsInserted.connect(self.emitChanged)
+        self.listModel.rowsRemoved.connect(self.emitChanged)
+        self.listModel.modelReset.connect(self.emitChanged)
+
+    def emitChanged(self, *args):
+        self.valuesChanged.emit()
+
+    def values(self):
+        return list(self.listModel.strings)
+
+    def setValues(self, values):
+        self.listModel.setStrings(values)
+
+    def appendValues(self, values):
+        self.listModel.appendStrings(values)
+
+    def onAdd(self):
+        self.appendValues(["{0}".format(self.newValue.text())])
+        self.newValue.clear()
+
+    def onPaste(self):
+        self.appendValues(splitLines("{0}".format(QtGui.QApplication.clipboard().text())))
+
+    def onImport(self):
+        filename = QtGui.QFileDialog.getOpenFileName(self, "Import values")
+        if isinstance(filename, tuple):
+            filename = filename[0]
+        if not filename:
+            return
+        try:
+            with io.open("{0}".format(filename), encoding="utf-8", errors="replace") as f:
+                self.appendValues(splitLines(f.read()))
+        except IOError:
+            QtGui.QMessageBox.critical(self, "Critical", "Couldn't read file {0}".format(filename))
+
+    def onRemove(self):
+        rows = sorted(set(i.row() for i in self.view.selectionModel().selectedIndexes()), reverse=True)
+        # remove contiguous runs of rows with one notification each
+        while rows:
+            last = first = rows.pop(0)
+            while rows and rows[0] == first - 1:
+                first = rows.pop(0)
+            self.listModel.removeRows(first, last - first + 1)
+
+    def onClear(self):
+        self.setValues([])
+
+
+def rangeBetween(r, low, high, limit):
+    """
+    at most limit members of an ascending range r between low and high (inclusive)
+    """
+    first = max(0, -(-(low - r.start) // r.step))
+    last = min(len(r) - 1, (high - r.start) // r.step)
+    return [r[i] for i in range(first, min(last + 1, first + limit))]
+
+
+def rangeStartingWith(r, prefix, limit):
+    """
+    at most limit members of range r whose text starts with prefix, found arithmetically
+    (the numbers starting with 12 are 12, 120-129, 1200-1299, ...) instead of formatting
+    every member
+    """
+    if not r or not re.match(r"^-?\d*$", prefix):
+        return []
+    r = r if r.step > 0 else r[::-1]
+    if prefix == "":
+        return list(itertools.islice(r, limit))
+    if prefix == "-":
+        return rangeBetween(r, r[0], -1, limit)
+    digits = prefix.lstrip("-")
+    if digits[0] == "0":
+        return [0] if prefix == "0" and 0 in r else []
+    n = int(digits)
+    result = []
+    scale = 1
+    while len(result) < limit:
+        if prefix[0] == "-":
+            low, high = -((n + 1) * scale - 1), -n * scale
+            if high < r[0]:
+                break
+        else:
+            low, high = n * scale, (n + 1) * scale - 1
+            if low > r[-1]:
+                break
+        result.extend(rangeBetween(r, low, high, limit - len(result)))
+        scale *= 10
+    return result
+
+
+class ChoicesModel(QtCore.QAbstractListModel):
+    """
+    read-only list model on top of the choices container of an action;
+    items are formatted only when a view asks for them, sequences (including
+    range objects) are indexed directly instead of being copied, and ranges
+    are searched arithmetically
+
+    the text lookup and prefix indices needed for other containers and for
+    type-ahead are only built when first needed
+    """
+    def __init__(self, choices, parent=None):
+        super(ChoicesModel, self).__init__(parent)
+        self.choices = choices if isinstance(choices, Sequence) else list(choices)
+        self.textToRow = None
+        self.sortedTexts = None
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.choices)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if index.isValid() and role in [QtCore.Qt.DisplayRole, QtCore.Qt.EditRole]:
+            return self.text(index.row())
+        return None
+
+    def text(self, row):
+        return "{0}".format(self.choices[row])
+
+    def find(self, text, value=None):
+        """
+        row of the choice shown as text, or -1; if the choice itself is known (e.g. the
+        default of the action) pass it as value: finding it, or the first choice, does not
+        format the other choices, so opening a dialog does not build the text lookup
+        """
+        if isinstance(self.choices, range):
+            try:
+                value = int(text)
+            except ValueError:
+                return -1
+            return self.choices.index(value) if value in self.choices else -1
+        if self.textToRow is None:
+            for row in [self.rowOf(value), 0]:
+                if 0 <= row < len(self.choices) and self.text(row) == text:
+                    return row
+            self.textToRow = {}
+            for row, c in enumerate(self.choices):
+                self.textToRow.setdefault("{0}".format(c), row)
+        return self.textToRow.get(text, -1)
+
+    def rowOf(self, value):
+        """
+        row of the choice value (compared as a value, without formatting), or -1
+        """
+        if value is None:
+            return -1
+        try:
+            return self.choices.index(value)
+        except (ValueError, TypeError):
+            return -1
+
+    def startingWith(self, prefix, limit=50):
+        """
+        at most limit choice texts starting with prefix, in sorted order
+        (for ranges: in numeric order, without formatting the whole range)
+        """
+        if isinstance(self.choices, range):
+            return ["{0}".format(v) for v in rangeStartingWith(self.choices, prefix, limit)]
+        if self.sortedTexts is None:
+            self.sortedTexts = sorted("{0}".format(c) for c in self.choices)
+        result = []
+        i = bisect.bisect_left(self.sortedTexts, prefix)
+        while i < len(self.sortedTexts) and len(result) < limit and self.sortedTexts[i].startswith(prefix):
+            result.append(self.sortedTexts[i])
+            i += 1
+        return result
+
+
+class ChoicesEditor(QtGui.QComboBox):
+    """
+    combo box for (possibly huge) choices: items come from a ChoicesModel,
+    the size of the combo box does not depend on its items, and typing shows
+    the choices that start with the typed text
+    """
+    def __init__(self, choices, parent=None):
+        super(ChoicesEditor, self).__init__(parent)
+        self.choicesModel = ChoicesModel(choices, self)
+        self.setModel(self.choicesModel)
+        self.view().setUniformItemSizes(True)
+        self.setSizeAdjustPolicy(QtGui.QComboBox.AdjustToMinimumContentsLength)
+        self.setMinimumContentsLength(16)
+        self.setEditable(True)
+        self.setInsertPolicy(QtGui.QComboBox.NoInsert)
+        self.matches = StringListModel(self)
+        completer = QtGui.QCompleter(self.matches, self)
+        completer.setCompletionMode(QtGui.QCompleter.UnfilteredPopupCompletion)
+        completer.activated[str].connect(self.selectText)
+        self.setCompleter(completer)
+        self.lineEdit().textEdited.connect(self.onTextEdited)
+        self.lineEdit().editingFinished.connect(self.onEditingFinished)
+
+    def currentChoice(self):
+        """
+        text of the selected choice (which may differ from what is being typed)
+        """
+        if self.currentIndex() < 0:
+            return ""
+        return self.choicesModel.text(self.currentIndex())
+
+    def selectText(self, text, value=None):
+        row = self.choicesModel.find("{0}".format(text), value)
+        if row >= 0:
+            self.setCurrentIndex(row)
+        return row >= 0
+
+    def onTextEdited(self, text):
+        self.matches.setStrings(self.choicesModel.startingWith("{0}".format(text)))
+        self.completer().complete()
+
+    def onEditingFinished(self):
+        if not self.selectText(self.currentText()):
+            self.setEditText(self.currentChoice())
+
+
+class PathEditor(QtGui.QWidget):
+    """
+    line edit for a path with a browse button; typing offers the entries of the directory
+    being typed as completions. Directories are listed by a (shared) paths.PathScanner in
+    its worker thread: a listing that is not cached yet fills the popup when it arrives.
+    mode is 'open', 'save' or 'directory' and selects the dialog of the browse button
+    """
+    textChanged = QtCore.pyqtSignal(str)
+    scanned = QtCore.pyqtSignal(object)
+
+    def __init__(self, scanner, mode='open', parent=None):
+        super(PathEditor, self).__init__(parent)
+        self.scanner = scanner
+        self.mode = mode
+        self.directory = None
+        layout = QtGui.QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.lineEdit = QtGui.QLineEdit(self)
+        layout.addWidget(self.lineEdit)
+        browse = QtGui.QToolButton(self)
+        browse.setText("...")
+        browse.clicked.connect(self.onBrowse)
+        layout.addWidget(browse)
+        self.matches = StringListModel(self)
+        completer = QtGui.QCompleter(self.matches, self)
+        completer.setCompletionMode(QtGui.QCompleter.UnfilteredPopupCompletion)
+        self.lineEdit.setCompleter(completer)
+        self.lineEdit.textChanged.connect(self.textChanged.emit)
+        self.lineEdit.textEdited.connect(self.onTextEdited)
+        # listings finish in the worker thread, the popup is filled on the GUI thread
+        self.scanned.connect(self.onScanned, QtCore.Qt.QueuedConnection)
+
+    def text(self):
+        return "{0}".format(self.lineEdit.text())
+
+    def setText(self, text):
+        self.lineEdit.setText(text)
+
+    def onTextEdited(self, text):
+        directory, head, prefix = splitPath("{0}".format(text))
+        names = self.scanner.cache.get(directory)
+        if names is not None:
+            self.showCompletions(head, names, prefix)
+        if names is None or directory != self.directory:
+            # (re)list in the background; a cached listing is only listed again if the directory changed
+            self.scanner.scan(directory).add_done_callback(self.scanned.emit)
+        self.directory = directory
+
+    def onScanned(self, future):
+        directory, head, prefix = splitPath(self.text())
+        if future.directory != directory or future.exception() is not None or not self.lineEdit.hasFocus():
+            return
+        self.showCompletions(head, future.result(), prefix)
+
+    def showCompletions(self, head, names, prefix):
+        self.matches.setStrings([head + name for name in completions(names, prefix)])
+        if self.matches.rowCount():
+            self.lineEdit.completer().complete()
+
+    def onBrowse(self):
+        if self.mode == 'directory':
+            filename = QtGui.QFileDialog.getExistingDirectory(self, "Choose directory", self.text())
+        elif self.mode == 'save':
+            filename = QtGui.QFileDialog.getSaveFileName(self, "Choose file", self.text())
+        else:
+            filename = QtGui.QFileDialog.getOpenFileName(self, "Choose file", self.text())
+        if isinstance(filename, tuple):
+            filename = filename[0]
+        if filename:
+            self.setText("{0}".format(filename))
+
+
+class CollapsibleSection(QtGui.QWidget):
+    """
+    titled section with a button that shows or hides its body, a widget with a form
+    layout; expandedChanged(bool) is emitted when the button is clicked (the body is
+    typically filled the first time it is expanded)
+    """
+    expandedChanged = QtCore.pyqtSignal(bool)
+
+    def __init__(self, title, description=None, left_label_alignment=None, parent=None):
+        super(CollapsibleSection, self).__init__(parent)
+        self.built = False
+        layout = QtGui.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.header = QtGui.QToolButton(self)
+        self.header.setText(title)
+        self.header.setCheckable(True)
+        self.header.setToolButtonStyle(QtCore.Qt.ToolButtonTextBesideIcon)
+        self.header.setArrowType(QtCore.Qt.RightArrow)
+        self.header.setAutoRaise(True)
+        self.header.toggled.connect(self.onToggled)
+        layout.addWidget(self.header)
+        self.body = QtGui.QWidget(self)
+        self.bodyLayout = QtGui.QFormLayout(self.body)
+        if left_label_alignment is not None:
+            self.bodyLayout.setLabelAlignment(QtCore.Qt.AlignLeft if left_label_alignment else QtCore.Qt.AlignRight)
+        if description:
+            self.bodyLayout.addRow(QtGui.QLabel(description, self.body))
+        self.body.hide()
+        layout.addWidget(self.body)
+
+    def isExpanded(self):
+        return self.header.isChecked()
+
+    def setExpanded(self, expanded):
+        self.header.setChecked(expanded)
+
+    def onToggled(self, expanded):
+        self.header.setArrowType(QtCore.Qt.DownArrow if expanded else QtCore.Qt.RightArrow)
+        self.expandedChanged.emit(expanded)
+        self.body.setVisible(expanded)
+
+
+class PresetPanel(QtGui.QWidget):
+    """
+    searchable list of the presets in a PresetLibrary; the list is filtered while
+    typing in the search box, clicking a preset emits presetChosen(name), and the
+    save row stores the current options under a name and comma separated tags
+    (through the save handler, which is called as save(name, tags))
+    """
+    presetChosen = QtCore.pyqtSignal(str)
+
+    def __init__(self, library, save, parent=None):
+        super(PresetPanel, self).__init__(parent)
+        self.library = library
+        self.save = save
+
+        layout = QtGui.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.searchBox = QtGui.QLineEdit(self)
+        self.searchBox.setPlaceholderText("search: name, tag:name, --option or --option=value")
+        self.searchBox.textChanged.connect(self.refresh)
+        layout.addWidget(self.searchBox)
+        self.view = QtGui.QListWidget(self)
+        self.view.setUniformItemSizes(True)
+        self.view.itemClicked.connect(self.onItemClicked)
+        layout.addWidget(self.view)
+
+        row = QtGui.QHBoxLayout()
+        self.nameEdit = QtGui.QLineEdit(self)
+        self.nameEdit.setPlaceholderText("preset name")
+        row.addWidget(self.nameEdit)
+        self.tagsEdit = QtGui.QLineEdit(self)
+        self.tagsEdit.setPlaceholderText("tags, comma separated")
+        row.addWidget(self.tagsEdit)
+        for label, handler in [("Save preset", self.onSave), ("Delete", self.onDelete)]:
+            b = QtGui.QPushButton(label, self)
+            b.clicked.connect(handler)
+            row.addWidget(b)
+        layout.addLayout(row)
+        self.refresh()
+
+    def refresh(self, *args):
+        self.view.clear()
+        for p in self.library.search("{0}".format(self.searchBox.text())):
+            item = QtGui.QListWidgetItem("{0}  [{1}]".format(p.name, ", ".join(p.tags)) if p.tags else p.name)
+            item.setData(QtCore.Qt.UserRole, p.name)
+            self.view.addItem(item)
+
+    def itemName(self, item):
+        return "{0}".format(item.data(QtCore.Qt.UserRole))
+
+    def onItemClicked(self, item):
+        name = self.itemName(item)
+        self.nameEdit.setText(name)
+        self.tagsEdit.setText(", ".join(self.library.tags(name)))
+        self.presetChosen.emit(name)
+
+    def onSave(self):
+        name = "{0}".format(self.nameEdit.text()).strip()
+        if not name:
+            return
+        tags = [t.strip() for t in "{0}".format(self.tagsEdit.text()).split(",") if t.strip()]
+        self.save(name, tags)
+        self.refresh()
+
+    def onDelete(self):
+        for item in self.view.selectedItems():
+            self.library.delete(self.itemName(item))
+        self.refresh()
@@ -0,0 +1,187 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+"""
+scaling benchmarks for the options dialog, using synthetic parsers
+
+times ArgparseUi construction, makeCommandLine, validateMutualExclusiveOptions,
+loading an argument file (parsing it plus copying the values into the ui, directly
+and through the dialog's loader thread),
+copyActionValuesToUi and onSave for a range of parser sizes, and prints one
+json object per measurement:
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_dialog.py --sizes 10 100 1000 10000
+
+with --headless the same operations are measured on an OptionsModel,
+which needs no Qt at all
+"""
+
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import makeParser, argumentFileLines  # noqa: E402
+
+
+def timeit(function, repeat, setup=None):
+    """
+    fastest of repeat calls of function, in seconds; setup (if any) is called, untimed,
+    before every call, e.g. to undo what the previous call changed
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        t0 = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def benchmarks(size, directory, headless):
+    """
+    (name, function, setup) for one parser size; setup puts the model back in the state
+    the function starts from (e.g. the defaults before loading), or is None
+    """
+    from argparseui import OptionsModel, schema
+    parser = makeParser(size)
+    filename = os.path.join(directory, "options-{0}.txt".format(size))
+    with open(filename, "w") as f:
+        f.write("\n".join(argumentFileLines(parser)) + "\n")
+    savename = os.path.join(directory, "saved-{0}.txt".format(size))
+
+    def uncached(function):
+        def run():
+            schema.clearCache()
+            return function()
+        return run
+
+    if headless:
+        model = OptionsModel(parser)
+        namespace = model.parseArgumentFile(filename)
+        loaded = lambda: model.applyNamespace(namespace)
+        yield "OptionsModel.__init__ (uncached schema)", uncached(lambda: OptionsModel(parser)), None
+        yield "OptionsModel.__init__", lambda: OptionsModel(parser), None
+        yield ("makeCommandLine (after one change)", lambda: (model.notify(model.states[0]), model.makeCommandLine()),
+               None)
+        yield "makeCommandLine (unchanged)", model.makeCommandLine, None
+        yield "validateMutualExclusiveOptions", model.validateMutualExclusiveOptions, None
+        yield "load", lambda: model.load(filename), model.resetToDefaults
+        yield "applyNamespace", loaded, model.resetToDefaults
+        yield "resetToDefaults", model.resetToDefaults, loaded
+        yield "save", lambda: model.save(savename), None
+        return
+
+    from argparseui import ArgparseUi
+    dialog = ArgparseUi(parser, use_scrollbars=True)
+    namespace = dialog.model.parseArgumentFile(filename)
+    actions = parser._get_optional_actions() + parser._get_positional_actions()
+
+    def init():
+        d = ArgparseUi(parser, use_scrollbars=True)
+        d.deleteLater()
+
+    def itemViewInit():
+        d = ArgparseUi(parser, use_item_view=True)
+        d.deleteLater()
+
+    def copyActionValuesToUi():
+        for a in actions:
+            dialog.copyActionValuesToUi(a, namespace)
+
+    def save():
+        dialog.filename = savename
+        dialog.onSave()
+
+    def loadFile():
+        """
+        load through the dialog (parsing in the loader thread, applying in batches)
+        and wait until the last batch is applied
+        """
+        from argparseui.qt import QtGui
+        app = QtGui.QApplication.instance()
+        errors = []
+        dialog.filename = None
+        dialog.loadFile(filename)
+        dialog.loader.failed.connect(errors.append)
+        while (dialog.filename != filename or dialog.applier is not None) and not errors:
+            app.processEvents()
+        if errors:
+            raise RuntimeError(errors[0])
+
+    def defaults():
+        dialog.model.resetToDefaults()
+
+    def loaded():
+        dialog.model.applyNamespace(namespace)
+
+    yield "ArgparseUi.__init__ (uncached schema)", uncached(init), None
+    yield "ArgparseUi.__init__", init, None
+    yield "ArgparseUi.__init__ (item view)", itemViewInit, None
+    yield "makeCommandLine (after one change)", lambda: (dialog.model.notify(dialog.model.states[0]),
+                                                         dialog.makeCommandLine()), None
+    yield "makeCommandLine (unchanged)", dialog.makeCommandLine, None
+    yield "validateMutualExclusiveOptions", dialog.validateMutualExclusiveOptions, None
+    yield "model.load (parse + copy to ui)", lambda: dialog.model.load(filename), defaults
+    yield "loadFile (loader thread + batches)", loadFile, defaults
+    yield "copyActionValuesToUi", copyActionValuesToUi, defaults
+    yield "onSave", save, None
+    yield "resetToDefaults (reusing the dialog)", dialog.resetToDefaults, loaded
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000], help="numbers of options")
+    p.add_argument("--repeat", type=int, default=3, help="runs per measurement (the fastest is reported)")
+    p.add_argument("--headless", action="store_true", help="benchmark the Qt-free OptionsModel only")
+    p.add_argument("--output", help="write the json lines to this file instead of stdout")
+    args = p.parse_args(argv)
+
+    app = None
+    if not args.headless:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from argparseui.qt import QtGui
+        app = QtGui.QApplication(sys.argv)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    directory = tempfile.mkdtemp(prefix="argparseui-bench-")
+    try:
+        for size in args.sizes:
+            for name, function, setup in benchmarks(size, directory, args.headless):
+                seconds = timeit(function, args.repeat, setup)
+                if app is not None:
+                    app.processEvents()
+                out.write(json.dumps({"benchmark": name, "size": size, "seconds": seconds,
+                                      "repeat": args.repeat, "headless": args.headless}) + "\n")
+                out.flush()
+    finally:
+        shutil.rmtree(directory)
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+"""
+startup benchmark: time to import argparseui, time to import Qt (on first
+access of ArgparseUi) and time until the dialog is first painted
+
+every measurement runs in a fresh interpreter; results are printed as json.
+Use --max-import-ms to fail (exit code 1) when importing argparseui gets slower
+than a given budget, e.g. in CI:
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/startup.py --max-import-ms 50
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import argparseui
+t1 = time.perf_counter()
+print(t1 - t0)
+"""
+
+FIRST_PAINT_SNIPPET = """
+import argparse, sys, time
+t0 = time.perf_counter()
+import argparseui
+t1 = time.perf_counter()
+ArgparseUi = argparseui.ArgparseUi
+from argparseui.qt import QtCore, QtGui
+t2 = time.perf_counter()
+
+parser = argparse.ArgumentParser()
+for i in range({options}):
+    parser.add_argument("--option-%d" % i, type=int, help="option number %d" % i)
+
+class FirstPaint(QtCore.QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Paint and not hasattr(self, "t"):
+            self.t = time.perf_counter()
+            QtCore.QTimer.singleShot(0, app.quit)
+        return False
+
+app = QtGui.QApplication(sys.argv)
+t3 = time.perf_counter()
+dialog = ArgparseUi(parser, use_scrollbars=True)
+t4 = time.perf_counter()
+watcher = FirstPaint()
+dialog.installEventFilter(watcher)
+dialog.show()
+QtCore.QTimer.singleShot(10000, app.quit)
+app.exec_()
+print(t1 - t0, t2 - t1, t3 - t2, t4 - t3, getattr(watcher, "t", float("nan")) - t4)
+"""
+
+
+def run(snippet):
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    out = subprocess.check_output([sys.executable, "-c", snippet], env=env, cwd=ROOT)
+    return [float(x) for x in out.decode().split()]
+
+
+def best(snippet, repeat):
+    """
+    per column, the fastest of repeat runs
+    """
+    runs = [run(snippet) for _ in range(repeat)]
+    return [min(column) for column in zip(*runs)]
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--repeat", type=int, default=5, help="runs per measurement (the fastest is reported)")
+    p.add_argument("--options", type=int, default=100, help="number of options in the dialog")
+    p.add_argument("--no-gui", action="store_true", help="only measure the import of argparseui")
+    p.add_argument("--max-import-ms", type=float, help="fail if importing argparseui takes longer")
+    args = p.parse_args(argv)
+
+    result = {"python": sys.version.split()[0], "repeat": args.repeat}
+    result["import_argparseui_ms"] = best(IMPORT_SNIPPET, args.repeat)[0] * 1000
+    if not args.no_gui:
+        columns = best(FIRST_PAINT_SNIPPET.format(options=args.options), args.repeat)
+        result.update({
+            "options": args.options,
+            "import_qt_ms": columns[1] * 1000,
+            "create_application_ms": columns[2] * 1000,
+            "create_dialog_ms": columns[3] * 1000,
+            "show_to_first_paint_ms": columns[4] * 1000,
+        })
+    print(json.dumps(result, indent=2, sort_keys=True))
+
+    if args.max_import_ms is not None and result["import_argparseui_ms"] > args.max_import_ms:
+        sys.stderr.write("importing argparseui took {0:.1f} ms, budget is {1:.1f} ms\n".format(
+            result["import_argparseui_ms"], args.max_import_ms))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
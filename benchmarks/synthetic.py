@@ -0,0 +1,77 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+"""
+generator of synthetic argparse parsers for benchmarks
+"""
+
+import argparse
+
+KINDS = ['store', 'store_true', 'count', 'append', 'choices']
+
+
+def makeParser(size, mutex_every=50, choices=20):
+    """
+    parser with size options, cycling through store, store_true, count, append
+    and choices options; every mutex_every options, two store_true options are
+    put into a mutually exclusive group instead (mutex_every=0 disables this)
+    """
+    parser = argparse.ArgumentParser(description="synthetic parser with {0} options".format(size))
+    i = 0
+    while i < size:
+        if mutex_every and i % mutex_every == mutex_every - 1 and i + 1 < size:
+            group = parser.add_mutually_exclusive_group()
+            group.add_argument("--mutex-{0}-a".format(i), action="store_true", help="mutex option {0} a".format(i))
+            group.add_argument("--mutex-{0}-b".format(i), action="store_true", help="mutex option {0} b".format(i))
+            i += 2
+            continue
+        kind = KINDS[i % len(KINDS)]
+        name = "--{0}-{1}".format(kind.replace("_", "-"), i)
+        help = "synthetic {0} option number {1}, with a help text long enough to be wrapped in the dialog".format(kind, i)
+        if kind == 'store':
+            parser.add_argument(name, type=int, default=i, help=help)
+        elif kind == 'store_true':
+            parser.add_argument(name, action="store_true", help=help)
+        elif kind == 'count':
+            parser.add_argument(name, action="count", help=help)
+        elif kind == 'append':
+            parser.add_argument(name, action="append", default=["a{0}".format(i), "b{0}".format(i)], help=help)
+        else:
+            parser.add_argument(name, choices=["choice-{0}".format(c) for c in range(choices)],
+                                default="choice-{0}".format(i % choices), help=help)
+        i += 1
+    return parser
+
+
+def argumentFileLines(parser, enable_every=2):
+    """
+    lines of an argument file that sets every enable_every-th option of a synthetic parser
+    """
+    lines = []
+    for n, a in enumerate(parser._get_optional_actions()):
+        if not a.option_strings or a.option_strings[0] == '-h' or n % enable_every:
+            continue
+        if a.option_strings[0].startswith('--mutex-') and a.option_strings[0].endswith('-b'):
+            continue
+        lines.append(a.option_strings[0])
+        if a.choices:
+            lines.append(a.choices[-1])
+        elif isinstance(a, argparse._AppendAction):
+            lines.extend(["x", a.option_strings[0], "y"])
+        elif a.nargs != 0:
+            lines.append("{0}".format(n))
+    return lines
@@ -17,7 +17,7 @@
 #      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
 ##############################################################################
 
-from distutils.core import setup
+from setuptools import setup
 from argparseui import __version__
 
 with open('README.txt') as f:
@@ -31,6 +31,7 @@ setup(name='argparseui',
       author_email='stefaan.himpe@gmail.com',
       url='https://github.com/shimpe/argparseui',
       packages=['argparseui'],
+      python_requires='>=3.7',
       classifiers=['Intended Audience :: Developers',
                    'Development Status :: 3 - Alpha',
                    'License :: OSI Approved :: GNU General Public License v3 or later (GPLv3+)',
@@ -0,0 +1,74 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+import argparse
+import time
+
+from argparseui.journal import Autosave
+from argparseui.model import OptionsModel
+
+
+def makeModel():
+    parser = argparse.ArgumentParser(prog="journaled")
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--name')
+    return OptionsModel(parser)
+
+
+def test_recover_an_interrupted_session(tmp_path):
+    model = makeModel()
+    autosave = Autosave(model, str(tmp_path), delay=0, max_delay=0)
+    autosave.start()
+    model.setState(model.states[0], True, "10")
+    model.setState(model.states[1], True, "x")
+    autosave.close()  # no discard: as if the session crashed
+
+    other = makeModel()
+    recovered = Autosave(other, str(tmp_path))
+    changes = recovered.recover()
+    assert [(s.action.dest, enabled, value) for s, enabled, value in changes] == [("size", True, "10"), ("name", True, "x")]
+    recovered.close(discard=True)
+    assert Autosave(makeModel(), str(tmp_path)).recover() == []
+
+
+def test_compaction_keeps_all_changes(tmp_path):
+    model = makeModel()
+    autosave = Autosave(model, str(tmp_path), delay=0, max_delay=0, compact_every=2)
+    autosave.start()
+    for i in range(5):
+        model.setState(model.states[0], True, "{0}".format(i))
+        while autosave.pending:
+            time.sleep(0.001)
+    model.setState(model.states[1], True, "last")
+    autosave.close()
+    changes = Autosave(makeModel(), str(tmp_path)).recover()
+    assert [(s.action.dest, value) for s, enabled, value in changes] == [("size", "4"), ("name", "last")]
+
+
+def test_concurrent_dialogs_use_separate_journals(tmp_path):
+    first, second = makeModel(), makeModel()
+    a = Autosave(first, str(tmp_path), delay=0, max_delay=0)
+    b = Autosave(second, str(tmp_path), delay=0, max_delay=0)
+    assert a.journalFile != b.journalFile
+    a.start()
+    b.start()
+    first.setState(first.states[0], True, "1")
+    second.setState(second.states[0], True, "2")
+    b.close(discard=True)
+    a.close()
+    changes = Autosave(makeModel(), str(tmp_path)).recover()
+    assert [(s.action.dest, value) for s, enabled, value in changes] == [("size", "1")]
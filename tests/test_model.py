@@ -0,0 +1,217 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+import argparse
+
+import pytest
+
+from argparseui.model import ConverterCache, LoadError, OptionsModel, ParseError
+
+
+def test_helper_parsers_keep_prefix_chars():
+    parser = argparse.ArgumentParser(prefix_chars='+')
+    parser.add_argument('+n', type=int)
+    model = OptionsModel(parser)
+    assert model.parseCommandLine(['+n', '3']).n == 3
+    assert model.parseArguments(['+n', '3']).n == '3'
+    with pytest.raises(ParseError):
+        model.parseCommandLine(['+n', 'x'])
+
+
+def test_helper_parsers_keep_allow_abbrev():
+    parser = argparse.ArgumentParser(allow_abbrev=False)
+    parser.add_argument('--verbose', action='store_true')
+    model = OptionsModel(parser)
+    with pytest.raises(ParseError):
+        model.parseCommandLine(['--verb'])
+
+
+def test_invalid_subcommand_options_raise_parse_error():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n', type=int)
+    subparsers = parser.add_subparsers(dest='command')
+    run = subparsers.add_parser('run', aliases=['r'])
+    run.add_argument('--speed', type=int)
+    model = OptionsModel(parser)
+    assert model.parseCommandLine(['run', '--speed', '3']).speed == 3
+    assert model.parseCommandLine(['r', '--speed', '4']).speed == 4
+    with pytest.raises(ParseError):
+        model.parseCommandLine(['run', '--speed', 'fast'])
+    with pytest.raises(ParseError):
+        model.parseCommandLine(['run', '--unknown'])
+    # the parsers of the program itself are left alone
+    assert run.error.__func__ is argparse.ArgumentParser.error
+
+
+def test_loading_does_not_open_files(tmp_path):
+    target = tmp_path / "output.txt"
+    target.write_text("keep me")
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--out', type=argparse.FileType('w'))
+    parser.add_argument('--level', type=int, choices=[1, 2])
+    model = OptionsModel(parser)
+    model.applyNamespace(model.parseArguments(['--out', str(target), '--level', '2']))
+    assert target.read_text() == "keep me"
+    assert model.values()['out'] == str(target)
+    assert model.values()['level'] == '2'
+
+
+def test_converter_cache_is_bounded():
+    calls = []
+
+    def convert(text):
+        calls.append(text)
+        return int(text)
+
+    cache = ConverterCache(size=2)
+    assert [cache.convert(convert, t) for t in ["1", "2", "1", "3", "1", "2"]] == [1, 2, 1, 3, 1, 2]
+    assert calls == ["1", "2", "3", "2"]
+    assert len(cache.results) == 2
+
+
+def test_reset_to_namespace_is_stable_for_append_defaults():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-a', action='append', default=['x', 'y'])
+    model = OptionsModel(parser)
+    for i in range(3):
+        namespace = parser.parse_args(model.makeCommandLine())
+        model.resetToNamespace(namespace)
+    assert model.makeCommandLine() == ['-a', 'x', '-a', 'y']
+    model.setValues(model.namespaceValues(parser.parse_args(['-a', 'z'])))
+    assert model.makeCommandLine() == ['-a', 'z']
+
+
+def test_parsing_subcommands_does_not_create_child_models():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('run').add_argument('--speed')
+    model = OptionsModel(parser)
+    namespace = model.parseArguments(['run', '--speed', 'fast'])
+    assert model.childModels == {}
+    model.applyNamespace(namespace)
+    assert model.makeCommandLine() == ['run', '--speed', 'fast']
+
+
+def makeParser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--verbose', action='store_true')
+    parser.add_argument('--tag', action='append')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--fast', action='store_true')
+    group.add_argument('--slow', action='store_true')
+    parser.add_argument('input')
+    return parser
+
+
+def test_make_command_line():
+    model = OptionsModel(makeParser())
+    assert model.makeCommandLine() == ['--size', '3']
+    verbose, tag, input_ = [model.stateFor(a) for a in model.parser._actions if a.dest in ['verbose', 'tag', 'input']]
+    model.setEnabled(verbose, True)
+    model.setState(tag, True, ['a', 'b c'])
+    model.setState(input_, True, 'data.txt')
+    assert model.makeCommandLine() == ['--size', '3', '--verbose', '--tag', 'a', '--tag', 'b c', 'data.txt']
+    assert model.parse_args().tag == ['a', 'b c']
+
+
+def test_command_line_cache_only_rebuilds_changed_segments():
+    model = OptionsModel(makeParser())
+    size = model.states[0]
+    first = model.makeCommandLine()
+    first.append('changed by the caller')
+    assert model.makeCommandLine() == ['--size', '3']
+    segments = [s.segment for s in model.states]
+    model.setValue(size, '5')
+    assert size.segment is None
+    assert all(s.segment is segment for s, segment in zip(model.states[1:], segments[1:]))
+    assert model.makeCommandLine() == ['--size', '5']
+
+
+def test_no_op_changes_are_not_notified():
+    model = OptionsModel(makeParser())
+    changes = []
+    model.addListener(lambda state, origin: changes.append((state.action.dest, origin)))
+    model.setValue(model.states[0], '3')
+    model.setState(model.states[0], True, '4', 'me')
+    assert changes == [('size', 'me')]
+
+
+def test_mutex_violations():
+    model = OptionsModel(makeParser())
+    fast, slow = model.mutexMembers[0]
+    assert model.validateMutualExclusiveOptions() == (True, [])
+    model.setEnabled(fast, True)
+    assert not model.isMutexViolation(fast)
+    model.setEnabled(slow, True)
+    assert model.isMutexViolation(fast) and model.isMutexViolation(slow)
+    assert model.validateMutualExclusiveOptions() == (False, [['--fast'], ['--slow']])
+    model.setEnabled(fast, False)
+    assert model.validateMutualExclusiveOptions() == (True, [])
+
+
+def test_reset_to_namespace_and_defaults():
+    parser = makeParser()
+    model = OptionsModel(parser)
+    model.resetToNamespace(parser.parse_args(['--size', '7', '--fast', 'in.txt']))
+    assert model.makeCommandLine() == ['--size', '7', '--fast', 'in.txt']
+    model.resetToNamespace(parser.parse_args(['x']))
+    assert model.makeCommandLine() == ['--size', '3', 'x']
+    model.resetToDefaults()
+    assert model.makeCommandLine() == ['--size', '3']
+
+
+def test_load_and_save_round_trip(tmp_path):
+    model = OptionsModel(makeParser())
+    model.setValues({'size': '9', 'tag': ['x', 'y'], 'slow': True, 'input': 'in.txt'})
+    filename = str(tmp_path / "options.txt")
+    model.save(filename)
+    other = OptionsModel(makeParser())
+    other.load(filename)
+    assert other.makeCommandLine() == model.makeCommandLine()
+    assert other.values() == model.values()
+
+
+def test_load_errors():
+    model = OptionsModel(makeParser())
+    with pytest.raises(LoadError):
+        model.parseArguments(['--unknown'])
+
+
+@pytest.mark.parametrize('option', ['-h', '--help', '--version'])
+def test_loading_help_or_version_raises_load_error(tmp_path, capsys, option):
+    parser = makeParser()
+    parser.add_argument('--version', action='version', version='1.0')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('run')
+    filename = tmp_path / "options.txt"
+    for args in [[option], ['x', 'run', option]]:
+        filename.write_text("\n".join(args) + "\n")
+        with pytest.raises(LoadError):
+            OptionsModel(parser).parseArgumentFile(str(filename))
+    assert capsys.readouterr() == ('', '')
+
+
+def test_checking_values():
+    model = OptionsModel(makeParser())
+    size = model.states[0]
+    assert model.checkValue(size) is None
+    assert "invalid int value" in model.checkValue(size, 'x')
+    with pytest.raises(ParseError):
+        model.parseCommandLine(['--size', 'x', 'in.txt'])
+    with pytest.raises(ParseError):
+        model.parseCommandLine(['--fast', '--slow', 'in.txt'])
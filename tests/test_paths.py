@@ -0,0 +1,98 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+import argparse
+import os
+import pathlib
+import subprocess
+import sys
+
+from argparseui.paths import DirectoryCache, PathScanner, checkFileType, completions, splitPath
+from argparseui.schema import pathKind
+
+
+def test_path_kinds():
+    parser = argparse.ArgumentParser()
+    kinds = [pathKind(parser.add_argument(*args, **kwargs)) for args, kwargs in [
+        (['--in'], dict(type=argparse.FileType('r'))),
+        (['--out'], dict(metavar='OUTPUT_DIR')),
+        (['--config'], dict(type=pathlib.Path)),
+        (['--log'], dict(metavar='FILE')),
+        (['--size'], dict(type=int)),
+        (['--files'], dict(metavar='FILE', nargs='+')),
+    ]]
+    assert kinds == ['file', 'directory', 'path', 'path', None, None]
+
+
+def test_importing_argparseui_does_not_load_path_scanning():
+    script = ("import sys, argparseui; "
+              "print([m for m in ['threading', 'concurrent.futures', 'pathlib'] if m in sys.modules])")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, "-c", script], cwd=root, universal_newlines=True)
+    assert output.strip() == "[]"
+
+
+def test_split_path():
+    assert splitPath("dir/sub/na") == (os.path.normpath("dir/sub"), "dir/sub/", "na")
+    assert splitPath("name") == (os.curdir, "", "name")
+    assert splitPath("~/x")[0] == os.path.normpath(os.path.expanduser("~"))
+
+
+def test_directory_listing_and_completion(tmp_path):
+    for name in ["alpha", "alpine", "beta", ".hidden"]:
+        (tmp_path / name).write_text("")
+    (tmp_path / "album").mkdir()
+    cache = DirectoryCache()
+    directory = str(tmp_path)
+    assert cache.get(directory) is None
+    names = cache.scan(directory)
+    assert cache.get(directory) is names
+    assert completions(names, "al") == ["album" + os.sep, "alpha", "alpine"]
+    assert completions(names, "al", limit=1) == ["album" + os.sep]
+    assert ".hidden" not in completions(names, "")
+    assert completions(names, ".") == [".hidden"]
+    scanner = PathScanner(cache)
+    assert scanner.scan(directory).result() == names
+    scanner.shutdown()
+
+
+def test_directory_cache_is_bounded():
+    cache = DirectoryCache(max_directories=2, max_entries=5)
+    cache.put("a", 0, ["1", "2"])
+    cache.put("b", 0, ["1", "2"])
+    cache.get("a")
+    cache.put("c", 0, ["1"])
+    assert list(cache.listings) == ["a", "c"]
+    cache.put("d", 0, ["1", "2", "3", "4"])
+    assert list(cache.listings) == ["c", "d"] and cache.entries == 5
+
+
+def test_check_file_type_does_not_open_files(tmp_path):
+    existing = tmp_path / "existing.txt"
+    existing.write_text("keep me")
+    missing = str(tmp_path / "missing.txt")
+    read, write, exclusive = argparse.FileType('r'), argparse.FileType('w'), argparse.FileType('x')
+    assert checkFileType(read, str(existing)) is None
+    assert checkFileType(read, "-") is None
+    assert "No such file" in checkFileType(read, missing)
+    assert "Is a directory" in checkFileType(read, str(tmp_path))
+    assert checkFileType(write, str(existing)) is None
+    assert checkFileType(write, missing) is None
+    assert "No such file" in checkFileType(write, str(tmp_path / "nowhere" / "x.txt"))
+    assert "File exists" in checkFileType(exclusive, str(existing))
+    assert existing.read_text() == "keep me"
+    assert not os.path.exists(missing)
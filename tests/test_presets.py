@@ -0,0 +1,80 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+import argparse
+
+from argparseui.model import OptionsModel
+from argparseui.presets import PresetLibrary, optionValues
+
+
+def makeModel():
+    parser = argparse.ArgumentParser(prog="presets")
+    parser.add_argument('--size', type=int)
+    parser.add_argument('--quiet', action='store_true')
+    return OptionsModel(parser)
+
+
+def test_save_search_and_load(tmp_path):
+    library = PresetLibrary(str(tmp_path / "presets.sqlite"), "presets")
+    model = makeModel()
+    size, quiet = model.states
+    model.setState(size, True, "10")
+    library.saveModel("big", model, tags=["nightly"])
+    model.setEnabled(quiet, True)
+    library.saveModel("big quiet", model)
+    assert optionValues(model) == [("--size", "10"), ("--quiet", "")]
+    assert [p.name for p in library.search("tag:nightly")] == ["big"]
+    assert sorted(p.name for p in library.search("--size=10")) == ["big", "big quiet"]
+    assert [p.name for p in library.search("--quiet")] == ["big quiet"]
+    assert [p.name for p in library.search("qui")] == ["big quiet"]
+    assert library.search("--size=11") == []
+    assert library.arguments("big") == ["--size", "10"]
+    assert library.tags("big") == ["nightly"]
+
+    other = makeModel()
+    other.applyNamespace(other.parseArguments(library.arguments("big quiet")))
+    assert other.makeCommandLine() == ["--size", "10", "--quiet"]
+
+    library.saveModel("big", other)
+    assert len(library) == 2 and library.tags("big") == []
+    library.delete("big")
+    assert [p.name for p in library.search()] == ["big quiet"]
+    library.close()
+
+
+def test_search_finds_options_by_any_option_string():
+    library = PresetLibrary(":memory:", "presets")
+    parser = argparse.ArgumentParser(prog="presets")
+    parser.add_argument('-s', '--size', type=int)
+    parser.add_argument('-v', '--verbose', action='store_true')
+    model = OptionsModel(parser)
+    size, verbose = model.states
+    model.setState(size, True, "3")
+    model.setEnabled(verbose, True)
+    library.saveModel("small", model)
+    assert optionValues(model) == [("-s", "3"), ("--size", "3"), ("-v", ""), ("--verbose", "")]
+    for query in ["-v", "--verbose", "-s=3", "--size=3", "--size --verbose"]:
+        assert [p.name for p in library.search(query)] == ["small"]
+    assert library.search("--size=4") == []
+    library.close()
+
+
+def test_scopes_are_separate(tmp_path):
+    path = str(tmp_path / "presets.sqlite")
+    PresetLibrary(path, "one").save("x", ["--a"])
+    assert len(PresetLibrary(path, "two")) == 0
+    assert PresetLibrary(path, "one").arguments("x") == ["--a"]
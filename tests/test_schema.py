@@ -0,0 +1,82 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+import argparse
+
+from argparseui import schema
+from argparseui.schema import compileParser
+
+
+def makeParser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=3, help="size of the thing")
+    parser.add_argument('--mode', choices=['fast', 'slow'])
+    parser.add_argument('input')
+    return parser
+
+
+def test_same_parser_hits_the_cache():
+    schema.clearCache()
+    first = compileParser(makeParser())
+    assert compileParser(makeParser()) is first
+    assert [o.dest for o in first.options] == ['size', 'mode', 'input']
+    assert [o.kind for o in first.options] == ['store', 'choice', 'store']
+    assert first.options[0].validator == 'int'
+
+
+def test_changed_parser_misses_the_cache():
+    schema.clearCache()
+    first = compileParser(makeParser())
+    changed = makeParser()
+    changed._actions[1].default = 5
+    assert compileParser(changed) is not first
+    changed = makeParser()
+    changed.add_argument('--extra')
+    assert compileParser(changed) is not first
+    assert compileParser(makeParser(), remove_defaults_from_helptext=True) is not first
+    assert compileParser(makeParser()) is first
+
+
+class UnhashableConverter(object):
+    __hash__ = None
+
+    def __eq__(self, other):
+        return isinstance(other, UnhashableConverter)
+
+    def __call__(self, text):
+        return text
+
+
+def test_unhashable_type_is_compiled_without_caching():
+    schema.clearCache()
+    parser = makeParser()
+    # (add_argument itself looks type= up in a dict, so set it afterwards)
+    parser.add_argument('--name').type = UnhashableConverter()
+    first = compileParser(parser)
+    assert first.fingerprint is None
+    assert [o.dest for o in first.options] == ['size', 'mode', 'name', 'input']
+    assert compileParser(parser) is not first
+    assert len(schema._cache) == 0
+
+
+def test_cache_is_bounded():
+    schema.clearCache()
+    for n in range(schema.CACHE_SIZE + 5):
+        parser = argparse.ArgumentParser()
+        parser.add_argument('--option{0}'.format(n))
+        compileParser(parser)
+    assert len(schema._cache) == schema.CACHE_SIZE
@@ -0,0 +1,49 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+import argparse
+
+from argparseui.model import OptionsModel
+from argparseui.search import OptionIndex
+
+
+def makeIndex():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output-dir', help="where results are written")
+    parser.add_argument('--outline', action='store_true', help="draw outlines")
+    parser.add_argument('--size', type=int, help="size of the output")
+    parser.add_argument('--mode', choices=['fast', 'thorough'])
+    return OptionIndex(OptionsModel(parser).states)
+
+
+def test_words_match_prefixes_and_substrings():
+    index = makeIndex()
+    assert index.match("") is None
+    assert index.match("ou") == {0, 1, 2}
+    assert index.match("utl") == {1}
+    assert index.match("thorough") == {3}
+    assert index.match("output size") == {2}
+    assert index.match("nothing") == set()
+
+
+def test_longer_words_narrow_cached_results():
+    index = makeIndex()
+    typed = ["o", "ou", "out", "outp", "outpu", "output"]
+    results = [index.match(word) for word in typed]
+    fresh = makeIndex()
+    assert results == [fresh.match(word) for word in reversed(typed)][::-1]
+    assert results[-1] == {0, 2}
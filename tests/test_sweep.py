@@ -0,0 +1,81 @@
+##############################################################################
+#      This file is part of argparseui.                                      #
+#                                                                            #
+#      argparseui is free software: you can redistribute it and/or modify    #
+#      it under the terms of the GNU General Public License as published by  #
+#      the Free Software Foundation, either version 3 of the License, or     #
+#      (at your option) any later version.                                   #
+#                                                                            #
+#      argparseui is distributed in the hope that it will be useful,        #
+#      but WITHOUT ANY WARRANTY; without even the implied warranty of        #
+#      MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         #
+#      GNU General Public License for more details.                          #
+#                                                                            #
+#      You should have received a copy of the GNU General Public License     #
+#      along with argparseui.  If not, see <http://www.gnu.org/licenses/>.   #
+##############################################################################
+
+import argparse
+import io
+
+import pytest
+
+from argparseui.model import OptionsModel, ParseError
+from argparseui.sweep import Sweep, expandValue
+
+
+def test_expand_values():
+    assert expandValue("plain") is None
+    assert list(expandValue("{a, b,c}")) == ["a", "b", "c"]
+    assert list(expandValue("{1..4}")) == ["1", "2", "3", "4"]
+    assert list(expandValue("{3..1}")) == ["3", "2", "1"]
+    assert list(expandValue("{0..1..0.25}")) == ["0.0", "0.25", "0.5", "0.75", "1.0"]
+    assert len(expandValue("{1..1000000000}")) == 1000000000
+    with pytest.raises(ValueError):
+        expandValue("{1..5..0}")
+
+
+def makeModel():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--fast', action='store_true')
+    group.add_argument('--slow', action='store_true')
+    parser.add_argument('--mode', choices=['a', 'b'])
+    return OptionsModel(parser)
+
+
+def test_cartesian_product():
+    model = makeModel()
+    size, fast, slow, mode = model.states
+    model.setState(size, True, "{1,2}")
+    sweep = Sweep(model, swept=[mode])
+    assert sweep.size() == 4
+    assert list(sweep.commandLines()) == [
+        ['--size', '1', '--mode', 'a'], ['--size', '1', '--mode', 'b'],
+        ['--size', '2', '--mode', 'a'], ['--size', '2', '--mode', 'b']]
+
+
+def test_mutually_exclusive_combinations_are_pruned():
+    model = makeModel()
+    size, fast, slow, mode = model.states
+    sweep = Sweep(model, swept=[fast, slow])
+    assert sweep.size() == 4
+    assert list(sweep.commandLines()) == [[], ['--slow'], ['--fast']]
+    model.setEnabled(fast, True)
+    model.setEnabled(slow, True)
+    assert list(Sweep(model).commandLines()) == []
+
+
+def test_namespaces_and_write():
+    model = makeModel()
+    size = model.states[0]
+    model.setState(size, True, "{1..3}")
+    sweep = Sweep(model)
+    assert [n.size for n in sweep.namespaces()] == [1, 2, 3]
+    f = io.StringIO()
+    assert sweep.write(f) == 3
+    assert f.getvalue().splitlines() == ["--size 1", "--size 2", "--size 3"]
+    model.setState(size, True, "{1,x}")
+    with pytest.raises(ParseError):
+        list(Sweep(model).namespaces())